@@ -7,9 +7,11 @@ and storing content in the memOS.as memory system.
 
 import time
 import traceback
+from datetime import datetime, timezone
 from typing import List, Optional
 from uuid import UUID, uuid4
 
+import numpy as np
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 
 from ..config import settings
@@ -174,6 +176,14 @@ async def ingest_text(
                 detail="No valid content chunks could be created",
             )
 
+        # Content that fits in one chunk was already analysed while it was
+        # processed; that chunk is the cleaned content itself
+        chunk_metadata = None
+        if len(chunks) == 1 and chunks[0] is processing_result.get(
+            "cleaned_content"
+        ):
+            chunk_metadata = processing_result["content_metadata"]
+
         logger.info(
             f"Created {len(chunks)} chunks for ingestion {ingestion_id}",
             embeddings_generated=processing_stats["embeddings_generated"],
@@ -190,6 +200,7 @@ async def ingest_text(
                 request,
                 ingestion_id,
                 processor,
+                chunk_metadata,
             )
 
             # Return immediate response
@@ -202,7 +213,12 @@ async def ingest_text(
         else:
             # Process synchronously
             results = await _process_chunks_sync(
-                chunks, embeddings, request, processor, memos_client
+                chunks,
+                embeddings,
+                request,
+                processor,
+                memos_client,
+                chunk_metadata,
             )
 
             # Determine overall status
@@ -304,10 +320,11 @@ async def ingest_text(
 
 async def _process_chunks_sync(
     chunks: List[str],
-    embeddings: List[Optional[List[float]]],
+    embeddings: List[Optional[np.ndarray]],
     request: IngestionRequest,
     processor: ContentProcessor,
     memos_client: MemOSClient,
+    chunk_metadata: Optional[dict] = None,
 ) -> List[IngestionResult]:
     """
     Process chunks synchronously with embeddings.
@@ -318,12 +335,16 @@ async def _process_chunks_sync(
         request: Original ingestion request
         processor: Content processor instance
         memos_client: memOS.as client
+        chunk_metadata: Metadata already extracted for a lone chunk
 
     Returns:
         List[IngestionResult]: Processing results for each chunk
     """
     results = []
 
+    # Every chunk of one ingestion carries the same timestamp
+    ingestion_timestamp = datetime.now(timezone.utc).isoformat()
+
     for i, chunk in enumerate(chunks):
         try:
             # Get corresponding embedding for this chunk
@@ -337,6 +358,8 @@ async def _process_chunks_sync(
                 processor=processor,
                 memos_client=memos_client,
                 embedding=embedding,
+                ingestion_timestamp=ingestion_timestamp,
+                content_metadata=chunk_metadata,
             )
             results.append(result)
 
@@ -361,10 +384,11 @@ async def _process_chunks_sync(
 
 async def _process_chunks_async(
     chunks: List[str],
-    embeddings: List[Optional[List[float]]],
+    embeddings: List[Optional[np.ndarray]],
     request: IngestionRequest,
     ingestion_id: UUID,
     processor: ContentProcessor,
+    chunk_metadata: Optional[dict] = None,
 ):
     """
     Process chunks asynchronously in background with embeddings.
@@ -375,6 +399,7 @@ async def _process_chunks_async(
         request: Original ingestion request
         ingestion_id: Unique ingestion identifier
         processor: Content processor instance
+        chunk_metadata: Metadata already extracted for a lone chunk
     """
     logger.info(f"Starting async processing for ingestion {ingestion_id}")
 
@@ -382,7 +407,12 @@ async def _process_chunks_async(
         # Use a fresh client context to avoid un-awaited coroutine issues
         async with MemOSClient() as memos_client:
             await _process_chunks_sync(
-                chunks, embeddings, request, processor, memos_client
+                chunks,
+                embeddings,
+                request,
+                processor,
+                memos_client,
+                chunk_metadata,
             )
 
         # TODO: Store results for later retrieval via status endpoint
@@ -401,7 +431,9 @@ async def _process_single_chunk(
     request: IngestionRequest,
     processor: ContentProcessor,
     memos_client: MemOSClient,
-    embedding: Optional[List[float]] = None,
+    embedding: Optional[np.ndarray] = None,
+    ingestion_timestamp: Optional[str] = None,
+    content_metadata: Optional[dict] = None,
 ) -> IngestionResult:
     """
     Process a single content chunk.
@@ -413,6 +445,9 @@ async def _process_single_chunk(
         request: Original ingestion request
         processor: Content processor instance
         memos_client: memOS.as client
+        embedding: Precomputed embedding for this chunk
+        ingestion_timestamp: ISO timestamp shared by the ingestion's chunks
+        content_metadata: Metadata already extracted for this chunk, if any
 
     Returns:
         IngestionResult: Processing result for this chunk
@@ -425,7 +460,8 @@ async def _process_single_chunk(
         print(f"DEBUG: Generated content hash: {content_hash}")
 
         # Extract additional metadata from content
-        content_metadata = processor.extract_metadata_from_content(chunk)
+        if content_metadata is None:
+            content_metadata = processor.extract_metadata_from_content(chunk)
         print(f"DEBUG: Extracted content metadata")
 
         # Create comprehensive metadata
@@ -434,6 +470,7 @@ async def _process_single_chunk(
             chunk_index=chunk_index,
             total_chunks=total_chunks,
             processing_info=content_metadata,
+            ingestion_timestamp=ingestion_timestamp,
         )
         print(f"DEBUG: Created storage metadata")
 
@@ -32,17 +32,32 @@ class Settings(BaseSettings):
     # Async processing
     enable_async_processing: bool = True
     async_queue_max_size: int = 1000
+    parse_pool_max_workers: Optional[int] = None  # AST parsing processes
 
     # LM Studio integration for embeddings
     lm_studio_base_url: str = "http://localhost:1234/v1"
     lm_studio_api_key: Optional[str] = None
     lm_studio_timeout: int = 30
     lm_studio_enabled: bool = True
+    lm_studio_retry_after_seconds: float = 30.0  # Back-off when unreachable
+    lm_studio_failure_threshold: int = 3  # Consecutive failures to back off
     
     # Embedding configuration
     embedding_enabled: bool = True
     embedding_batch_size: int = 10
     embedding_dimension: int = 768  # Default for nomic-embed models
+    embedding_cache_size: int = 10_000  # In-process LRU entries
+    embedding_cache_path: Optional[str] = None  # SQLite file for persistence
+    embedding_cache_encoding: str = "float16"  # float32, float16 or int8
+    embedding_cache_memory_encoding: str = "float32"  # Same, for the LRU
+    fuzzy_cache_enabled: bool = False  # Reuse embeddings of near-duplicates
+    fuzzy_cache_threshold: float = 0.98  # Minimum MinHash Jaccard estimate
+    embedding_coalesce_max_size: int = 64  # Max texts per coalesced request
+    embedding_coalesce_max_wait_ms: float = 5.0  # Max time to wait for peers
+    embedding_request_max_size: int = 32  # Texts per LM Studio request
+    embedding_request_token_budget: int = 8192  # Padded tokens per request
+    embedding_max_inflight_requests: int = 4  # Concurrent LM Studio requests
+    enable_gpu_similarity: bool = False  # Top-k search on CUDA via CuPy
 
     # Observability
     jaeger_endpoint: str = "http://devenviro_jaeger:14268/api/traces"
@@ -56,6 +71,7 @@ class Settings(BaseSettings):
     langfuse_host: str = "https://cloud.langfuse.com"
     langfuse_api_key_public: Optional[str] = None  # Alternative naming
     langfuse_api_key_secret: Optional[str] = None  # Alternative naming
+    langfuse_trace_detection: bool = False  # Trace every type detection
 
     class Config:
         env_file = ".env"
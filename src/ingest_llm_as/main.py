@@ -7,6 +7,12 @@ from .api.ecosystem import router as ecosystem_router
 from .api.analysis import router as analysis_router
 from .observability.setup import setup_observability, get_observability_status
 from .observability.logging import get_logger
+from .services.vectorizer import (
+    VectorizerError,
+    close_vectorizer,
+    get_vectorizer,
+)
+from .services.repository_processor import close_parse_pool
 
 # Initialize structured logging
 logger = get_logger(__name__)
@@ -28,6 +34,25 @@ app.include_router(ecosystem_router)
 app.include_router(analysis_router)
 
 
+@app.on_event("startup")
+async def startup():
+    """Snapshot LM Studio's model list before the first request."""
+    if not (settings.embedding_enabled and settings.lm_studio_enabled):
+        return
+    try:
+        await get_vectorizer().refresh_models()
+    except VectorizerError as e:
+        # Not fatal: models are looked up again on first use
+        logger.warning("LM Studio models unavailable at startup: %s", e)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release pooled connections and parse workers on shutdown."""
+    await close_vectorizer()
+    close_parse_pool()
+
+
 @app.get("/", response_model=dict)
 def read_root():
     """
@@ -105,6 +105,11 @@ class MemoryStorageRequest(BaseModel):
     embedding: Optional[List[float]] = None
     relationships: List[Dict[str, Any]] = Field(default_factory=list)
 
+    @validator("embedding", pre=True)
+    def embedding_to_list(cls, v):
+        """Accept NumPy embedding vectors, converting them only here."""
+        return v.tolist() if hasattr(v, "tolist") else v
+
 
 class MemoryStorageResponse(BaseModel):
     """Response from memOS.as memory storage."""
@@ -302,6 +307,8 @@ class FileProcessingResult(BaseModel):
     complexity_score: float = 0.0
     error_message: Optional[str] = None
     memory_ids: List[UUID] = Field(default_factory=list)
+    duplicate_of: Optional[str] = None  # File with identical content
+    duplicate_paths: List[str] = Field(default_factory=list)  # Its copies
 
 
 class RepositoryProcessingSummary(BaseModel):
@@ -610,4 +610,20 @@ def extract_code_elements(source_code: str, file_path: Optional[str] = None) ->
     """
     parser = PythonASTParser()
     result = parser.parse_source(source_code, file_path)
-    return result.elements if result.success else []
\ No newline at end of file
+    return result.elements if result.success else []
+
+
+def parse_python_source(source_code: str, file_path: Optional[str] = None) -> ParsingResult:
+    """
+    Parse Python source into a ParsingResult.
+    
+    Module-level and picklable so it can be dispatched to a process pool.
+    
+    Args:
+        source_code: Python source code
+        file_path: Optional file path for context
+        
+    Returns:
+        ParsingResult: Results of parsing including extracted elements
+    """
+    return PythonASTParser().parse_source(source_code, file_path)
@@ -232,6 +232,87 @@ class ProgressLogger:
         if files_processed % max(1, total_files // 10) == 0 or files_processed % 10 == 0:
             await self._store_progress_entry(entry)
     
+    async def log_batch_processing_progress(
+        self,
+        ingestion_id: str,
+        files_processed: int,
+        total_files: int,
+        batch_results: List[FileProcessingResult]
+    ) -> None:
+        """
+        Log progress for a whole batch of processed files.
+        
+        Emits one aggregated entry per batch instead of one per file; failed
+        files still get an individual error entry.
+        
+        Args:
+            ingestion_id: Unique ingestion identifier
+            files_processed: Number of files processed so far
+            total_files: Total files to process
+            batch_results: Processing results of the files in this batch
+        """
+        if not batch_results:
+            return
+        
+        timestamp = datetime.now(timezone.utc).isoformat()
+        
+        # Calculate progress (discovery=10%, processing=80%, finalization=10%)
+        processing_progress = (files_processed / total_files) * 80.0 if total_files > 0 else 0
+        total_progress = 10.0 + processing_progress  # Add discovery progress
+        
+        failed_results = [
+            result for result in batch_results
+            if result.status == ProcessingStatus.FAILED
+        ]
+        
+        details = {
+            "files_processed": files_processed,
+            "total_files": total_files,
+            "processing_rate": f"{files_processed/max(1, total_files)*100:.1f}%",
+            "batch_size": len(batch_results),
+            "batch_failed": len(failed_results),
+            "batch_bytes": sum(result.file_size for result in batch_results),
+            "elements_extracted": sum(result.elements_extracted for result in batch_results),
+            "chunks_created": sum(result.chunks_created for result in batch_results),
+            "embeddings_generated": sum(result.embeddings_generated for result in batch_results),
+            "processing_time_ms": max(result.processing_time_ms for result in batch_results)
+        }
+        
+        entries = self.progress_entries[ingestion_id]
+        
+        # Keep per-file entries for failures only
+        for result in failed_results:
+            self.logger.error(
+                f"Failed to process {result.relative_path} in {ingestion_id}: {result.error_message}"
+            )
+            entries.append(ProgressLogEntry(
+                timestamp=timestamp,
+                ingestion_id=ingestion_id,
+                stage="processing",
+                status="failed",
+                progress_percentage=total_progress,
+                files_processed=files_processed,
+                total_files=total_files,
+                current_file=result.relative_path,
+                details={"file_size": result.file_size},
+                error_message=result.error_message
+            ))
+        
+        entry = ProgressLogEntry(
+            timestamp=timestamp,
+            ingestion_id=ingestion_id,
+            stage="processing",
+            status="in_progress",
+            progress_percentage=total_progress,
+            files_processed=files_processed,
+            total_files=total_files,
+            current_file=batch_results[-1].relative_path,
+            details=details
+        )
+        
+        entries.append(entry)
+        await self._store_progress_entry(entry)
+    
     async def log_ingestion_complete(
         self,
         ingestion_id: str,
@@ -6,17 +6,33 @@ including file discovery, batch processing, and comprehensive analysis.
 """
 
 import asyncio
+import heapq
+import mmap
+import multiprocessing
+import os
+import re
 import time
 import tempfile
 import shutil
-import subprocess
+import stat
+import threading
 from pathlib import Path
-from typing import List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import fnmatch
 from uuid import UUID
 
+import numpy as np
+
+try:
+    import pygit2
+    PYGIT2_AVAILABLE = True
+except ImportError:
+    PYGIT2_AVAILABLE = False
+
 from ..models import (
     RepositoryIngestionRequest,
     RepositoryIngestionResponse,
@@ -27,7 +43,7 @@ from ..models import (
     MemoryTier
 )
 from ..utils.content_processor import ContentProcessor
-from ..services.memos_client import get_memos_client, MemOSClient
+from ..services.memos_client import get_memos_client, generate_content_hash, MemOSClient
 from ..services.progress_logger import get_progress_logger
 from ..observability.logging import get_logger
 from ..observability.langfuse_client import get_langfuse_client
@@ -35,8 +51,339 @@ from ..config import settings
 
 logger = get_logger(__name__)
 
+# Maximum time allowed for cloning a remote repository
+CLONE_TIMEOUT_SECONDS = 300  # 5 minutes
 
-@dataclass
+# Number of files collected before size/pattern filtering is applied
+DISCOVERY_BATCH_SIZE = 1024
+
+# Files at least this large are decoded straight from a memory map
+MMAP_READ_THRESHOLD = 64 * 1024
+
+# Directories that never contain ingestible sources and are never descended into
+PRUNE_DIRS = frozenset({
+    ".git", ".hg", ".svn", "__pycache__", ".mypy_cache", ".pytest_cache",
+    ".ruff_cache", ".tox", ".nox", "node_modules", ".venv", "venv",
+})
+
+# Characters with special meaning in glob patterns
+_GLOB_CHARS_RE = re.compile(r"[*?\[]")
+
+# Exclude patterns that exclude a whole directory by name, e.g. "**/build/**"
+_DIRECTORY_EXCLUDE_RE = re.compile(r"^(?:\*\*/)?([^/]+)/\*\*$")
+
+# Number of leading bytes inspected when sniffing for binary content
+BINARY_SNIFF_BYTES = 8192
+
+# Extensions that are always treated as binary without reading the file
+BINARY_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tiff",
+    ".pdf", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".tar", ".rar",
+    ".jar", ".whl", ".egg", ".so", ".dll", ".dylib", ".exe", ".bin",
+    ".o", ".a", ".lib", ".class", ".pyc", ".pyo", ".pyd",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot",
+    ".mp3", ".mp4", ".wav", ".avi", ".mov", ".mkv", ".flac", ".ogg",
+    ".db", ".sqlite", ".sqlite3", ".npy", ".npz", ".pkl", ".pickle",
+})
+
+
+class CloneCancelled(Exception):
+    """Raised inside a pygit2 clone to abort it."""
+    pass
+
+
+if PYGIT2_AVAILABLE:
+
+    class _CancellableCallbacks(pygit2.RemoteCallbacks):
+        """Remote callbacks that abort the transfer once cancelled is set."""
+        
+        def __init__(self, cancelled: threading.Event):
+            super().__init__()
+            self.cancelled = cancelled
+        
+        def sideband_progress(self, string: str) -> None:
+            if self.cancelled.is_set():
+                raise CloneCancelled()
+        
+        def transfer_progress(self, stats) -> None:
+            if self.cancelled.is_set():
+                raise CloneCancelled()
+
+
+def _clone_with_pygit2(
+    url: str,
+    target_dir: Path,
+    cancelled: threading.Event
+) -> None:
+    """
+    Shallow-clone a repository in-process with libgit2.
+    
+    Blocking; run it in an executor. libgit2 can't be interrupted from
+    outside, so the clone checks ``cancelled`` from its progress callbacks
+    and aborts with CloneCancelled once it is set.
+    
+    Args:
+        url: Repository URL
+        target_dir: Directory to clone into
+        cancelled: Event that aborts the clone when set
+    """
+    pygit2.clone_repository(
+        url,
+        str(target_dir),
+        depth=1,
+        callbacks=_CancellableCallbacks(cancelled)
+    )
+
+
+async def _clone_with_pygit2_async(url: str, target_dir: Path) -> None:
+    """
+    Run a pygit2 clone in an executor, bounded by CLONE_TIMEOUT_SECONDS.
+    
+    On timeout (or cancellation) the clone is told to abort and awaited, so
+    the executor thread has stopped writing into ``target_dir`` by the time
+    the caller removes it.
+    
+    Args:
+        url: Repository URL
+        target_dir: Directory to clone into
+        
+    Raises:
+        pygit2.GitError: If the clone fails
+        asyncio.TimeoutError: If the clone exceeds CLONE_TIMEOUT_SECONDS
+    """
+    cancelled = threading.Event()
+    clone = asyncio.get_running_loop().run_in_executor(
+        None, _clone_with_pygit2, url, target_dir, cancelled
+    )
+    try:
+        # Shielded so a timeout leaves the future to report the thread's end
+        await asyncio.wait_for(
+            asyncio.shield(clone), timeout=CLONE_TIMEOUT_SECONDS
+        )
+    except BaseException:
+        cancelled.set()
+        await asyncio.gather(clone, return_exceptions=True)
+        raise
+
+
+async def _clone_with_git_cli(url: str, target_dir: Path) -> None:
+    """
+    Clone a repository with the git CLI without blocking the event loop.
+    
+    Uses a blobless, single-branch shallow clone.
+    
+    Args:
+        url: Repository URL
+        target_dir: Directory to clone into
+        
+    Raises:
+        RuntimeError: If git exits with a non-zero status
+        asyncio.TimeoutError: If the clone exceeds CLONE_TIMEOUT_SECONDS
+    """
+    process = await asyncio.create_subprocess_exec(
+        "git", "clone",
+        "--depth", "1",
+        "--filter=blob:none",
+        "--single-branch",
+        "--no-tags",
+        url, str(target_dir),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    
+    try:
+        _, stderr = await asyncio.wait_for(
+            process.communicate(),
+            timeout=CLONE_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+    
+    if process.returncode != 0:
+        raise RuntimeError(
+            f"Git clone failed: {stderr.decode('utf-8', errors='replace')}"
+        )
+
+
+def _sniff_binary(path: Path) -> bool:
+    """
+    Check whether a file looks binary using git's NUL-byte heuristic.
+    
+    Args:
+        path: File to inspect
+        
+    Returns:
+        bool: True if the file head contains a NUL byte
+    """
+    with open(path, 'rb') as f:
+        return b"\x00" in f.read(BINARY_SNIFF_BYTES)
+
+
+async def _iter_pairs(
+    chunks: List[str],
+    embeddings: List[Optional[np.ndarray]]
+) -> AsyncIterator[Tuple[str, Optional[np.ndarray]]]:
+    """Adapt precomputed chunks and embeddings to a (chunk, embedding) stream."""
+    for i, chunk in enumerate(chunks):
+        yield chunk, embeddings[i] if i < len(embeddings) else None
+
+
+def _read_text_file(path: Path, size_bytes: int) -> str:
+    """
+    Read a file as UTF-8 text, ignoring undecodable bytes.
+    
+    Large files are decoded directly from a read-only memory map so the raw
+    bytes are never copied into an intermediate ``bytes`` object.
+    
+    Args:
+        path: File to read
+        size_bytes: File size in bytes (from discovery)
+        
+    Returns:
+        str: Decoded file content with universal newlines
+    """
+    if size_bytes < MMAP_READ_THRESHOLD:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        content = str(memoryview(mm), 'utf-8', 'ignore')
+    
+    # Match text-mode newline translation
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content
+
+
+@lru_cache(maxsize=128)
+def _directory_exclude_globs(patterns: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Extract directory-name globs from exclude patterns like ``**/<name>/**``.
+    
+    Args:
+        patterns: Exclude glob patterns
+        
+    Returns:
+        Tuple[str, ...]: Globs matched against directory names during the walk
+    """
+    return tuple(
+        match.group(1)
+        for match in map(_DIRECTORY_EXCLUDE_RE.match, patterns)
+        if match
+    )
+
+
+def _glob_condition(pattern: str, namespace: Dict[str, Any]) -> str:
+    """
+    Translate a glob pattern into a Python boolean expression over ``path``.
+    
+    Common shapes become plain string operations with the same semantics as
+    fnmatch (where ``*`` also matches path separators); anything else falls
+    back to a precompiled regex bound into ``namespace``.
+    
+    Args:
+        pattern: Glob pattern (already normcased)
+        namespace: Globals of the generated predicate
+        
+    Returns:
+        str: Python expression source
+    """
+    sep = os.path.normcase("/")
+    deep_prefix = f"**{sep}*"
+    
+    # "*<suffix>" -> path.endswith(suffix)
+    if pattern.startswith("*") and not _GLOB_CHARS_RE.search(pattern[1:]):
+        return f"path.endswith({pattern[1:]!r})"
+    
+    # "**/*<suffix>" -> a separator somewhere before the suffix
+    if pattern.startswith(deep_prefix) and not _GLOB_CHARS_RE.search(pattern[len(deep_prefix):]):
+        suffix = pattern[len(deep_prefix):]
+        if not suffix:
+            return f"{sep!r} in path"
+        return f"(path.endswith({suffix!r}) and {sep!r} in path[:{-len(suffix)}])"
+    
+    # "*<substring>*" (including "**/<dir>/**") -> substring test
+    inner = pattern.strip("*")
+    if pattern.startswith("*") and pattern.endswith("*") and not _GLOB_CHARS_RE.search(inner):
+        return f"{inner!r} in path" if inner else "True"
+    
+    # Literal path
+    if not _GLOB_CHARS_RE.search(pattern):
+        return f"path == {pattern!r}"
+    
+    name = f"_match_{len(namespace)}"
+    namespace[name] = re.compile(fnmatch.translate(pattern)).match
+    return f"{name}(path) is not None"
+
+
+@lru_cache(maxsize=128)
+def _compile_path_predicate(
+    include_patterns: Tuple[str, ...],
+    exclude_patterns: Tuple[str, ...]
+) -> Callable[[str], Optional[str]]:
+    """
+    Generate a straight-line predicate for a set of include/exclude patterns.
+    
+    The predicate is compiled once per pattern set and returns the skip
+    reason for a normcased relative path, or None if it should be processed.
+    
+    Args:
+        include_patterns: Glob patterns for files to include
+        exclude_patterns: Glob patterns for files to exclude
+        
+    Returns:
+        Callable[[str], Optional[str]]: Compiled ``check(path)`` function
+    """
+    namespace: Dict[str, Any] = {}
+    lines = ["def check(path):"]
+    
+    # Exclude patterns first, in order, so the first match names the reason
+    for pattern in exclude_patterns:
+        condition = _glob_condition(os.path.normcase(pattern), namespace)
+        lines.append(f"    if {condition}:")
+        lines.append(f"        return {f'Excluded by pattern: {pattern}'!r}")
+    
+    for pattern in include_patterns:
+        condition = _glob_condition(os.path.normcase(pattern), namespace)
+        lines.append(f"    if {condition}:")
+        lines.append("        return None")
+    
+    lines.append(
+        f"    return {f'Not matched by include patterns: {list(include_patterns)}'!r}"
+    )
+    
+    exec("\n".join(lines), namespace)
+    return namespace["check"]
+
+
+@lru_cache(maxsize=128)
+def _compile_glob_union(patterns: Tuple[str, ...]) -> Optional["re.Pattern[str]"]:
+    """
+    Compile glob patterns into a single alternation regex.
+    
+    Each pattern is wrapped in a named group so the matching pattern can be
+    recovered from ``match.lastgroup`` (``p<index>``).
+    
+    Args:
+        patterns: Glob patterns to combine
+        
+    Returns:
+        Optional[re.Pattern[str]]: Combined matcher, or None if no patterns
+    """
+    if not patterns:
+        return None
+    
+    return re.compile(
+        "|".join(
+            f"(?P<p{index}>{fnmatch.translate(os.path.normcase(pattern))})"
+            for index, pattern in enumerate(patterns)
+        )
+    )
+
+
+@dataclass(slots=True)
 class DiscoveredFile:
     """Represents a discovered file in the repository."""
     
@@ -44,10 +391,58 @@ class DiscoveredFile:
     relative_path: Path
     size_bytes: int
     is_python: bool = False
+    is_binary: bool = False
     should_process: bool = True
     skip_reason: Optional[str] = None
 
 
+@dataclass
+class DiscoveredFiles:
+    """
+    Struct-of-arrays collection of files discovered in a repository.
+    
+    Keeps per-file attributes in parallel arrays so that large repositories
+    do not allocate one object per file; DiscoveredFile records are only
+    materialized for files that are actually processed.
+    """
+    
+    absolute_paths: List[Path] = field(default_factory=list)
+    relative_paths: List[Path] = field(default_factory=list)
+    sizes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    is_python: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+    is_binary: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+    should_process: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+    skip_reasons: List[Optional[str]] = field(default_factory=list)
+    
+    def __len__(self) -> int:
+        return len(self.absolute_paths)
+    
+    def __getitem__(self, index: int) -> DiscoveredFile:
+        return DiscoveredFile(
+            absolute_path=self.absolute_paths[index],
+            relative_path=self.relative_paths[index],
+            size_bytes=int(self.sizes[index]),
+            is_python=bool(self.is_python[index]),
+            is_binary=bool(self.is_binary[index]),
+            should_process=bool(self.should_process[index]),
+            skip_reason=self.skip_reasons[index]
+        )
+    
+    @property
+    def python_count(self) -> int:
+        """Number of discovered Python files."""
+        return int(np.count_nonzero(self.is_python))
+    
+    @property
+    def process_count(self) -> int:
+        """Number of files selected for processing."""
+        return int(np.count_nonzero(self.should_process))
+    
+    def files_to_process(self) -> List[DiscoveredFile]:
+        """Materialize the files selected for processing."""
+        return [self[int(index)] for index in np.flatnonzero(self.should_process)]
+
+
 class RepositoryProcessor:
     """
     Processes Python repositories for comprehensive code analysis and ingestion.
@@ -60,7 +455,10 @@ class RepositoryProcessor:
         """Initialize the repository processor."""
         self.logger = get_logger(__name__)
         self.langfuse_client = get_langfuse_client()
-        self.content_processor = ContentProcessor(enable_embeddings=settings.embedding_enabled)
+        self.content_processor = ContentProcessor(
+            enable_embeddings=settings.embedding_enabled,
+            parse_executor=get_parse_pool()
+        )
         self.progress_logger = get_progress_logger()
     
     async def process_repository(
@@ -122,7 +520,7 @@ class RepositoryProcessor:
             discovery_time = int((time.time() - discovery_start) * 1000)
             
             response.files_discovered = len(discovered_files)
-            response.files_to_process = len([f for f in discovered_files if f.should_process])
+            response.files_to_process = discovered_files.process_count
             response.discovery_time_ms = discovery_time
             
             # Log discovery completion
@@ -242,16 +640,21 @@ class RepositoryProcessor:
             temp_dir = Path(tempfile.mkdtemp(prefix="repo_ingest_"))
             
             try:
-                # Use git clone
-                result = subprocess.run(
-                    ["git", "clone", "--depth", "1", request.source_path, str(temp_dir)],
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # 5 minute timeout
-                )
+                clone_backend = "git"
+                if PYGIT2_AVAILABLE:
+                    try:
+                        await _clone_with_pygit2_async(
+                            request.source_path, temp_dir
+                        )
+                        clone_backend = "pygit2"
+                    except pygit2.GitError as e:
+                        # e.g. transports without shallow fetch support
+                        self.logger.warning(f"pygit2 clone failed, falling back to git CLI: {e}")
+                        shutil.rmtree(temp_dir, ignore_errors=True)
+                        temp_dir.mkdir()
                 
-                if result.returncode != 0:
-                    raise RuntimeError(f"Git clone failed: {result.stderr}")
+                if clone_backend == "git":
+                    await _clone_with_git_cli(request.source_path, temp_dir)
                 
                 self.logger.info(f"Successfully cloned repository to {temp_dir}")
                 
@@ -260,14 +663,14 @@ class RepositoryProcessor:
                     self.langfuse_client.client.generation(
                         trace_id=trace_id,
                         name="git_clone",
-                        model="git",
+                        model=clone_backend,
                         input={"repository_url": request.source_path},
                         output={"temp_directory": str(temp_dir), "success": True}
                     )
                 
                 return temp_dir
                 
-            except subprocess.TimeoutExpired:
+            except asyncio.TimeoutError:
                 shutil.rmtree(temp_dir, ignore_errors=True)
                 raise RuntimeError("Git clone timed out after 5 minutes")
             except Exception as e:
@@ -282,60 +685,91 @@ class RepositoryProcessor:
         repo_path: Path,
         request: RepositoryIngestionRequest,
         trace_id: Optional[str] = None
-    ) -> List[DiscoveredFile]:
+    ) -> DiscoveredFiles:
         """
         Discover and filter files in the repository.
         
+        Files are collected in batches; size limits are applied to each batch
+        as a vectorized NumPy mask before pattern matching.
+        
         Args:
             repo_path: Path to repository
             request: Repository ingestion request
             trace_id: Optional Langfuse trace ID
             
         Returns:
-            List[DiscoveredFile]: Discovered files with processing decisions
+            DiscoveredFiles: Discovered files with processing decisions
         """
-        discovered_files = []
+        discovered = DiscoveredFiles()
+        size_batches: List[np.ndarray] = []
+        process_batches: List[np.ndarray] = []
+        binary_batches: List[np.ndarray] = []
+        python_batches: List[np.ndarray] = []
+        
+        batch_paths: List[Path] = []
+        batch_relative: List[Path] = []
+        batch_sizes: List[int] = []
+        batch_python: List[bool] = []
+        
+        # Running counters, so nothing is recounted over the discovered files
+        total_files = 0
+        python_files = 0
+        files_to_process = 0
+        
+        def flush_batch() -> bool:
+            """Filter the pending batch and append it; returns True at max_files."""
+            nonlocal total_files, python_files, files_to_process
+            
+            sizes = np.fromiter(batch_sizes, dtype=np.int64, count=len(batch_sizes))
+            should_process, is_binary, skip_reasons, cutoff = self._filter_discovery_batch(
+                batch_paths, batch_relative, sizes, request,
+                request.max_files - files_to_process
+            )
+            is_python = np.fromiter(batch_python, dtype=bool, count=len(batch_python))[:cutoff]
+            total_files += cutoff
+            python_files += int(np.count_nonzero(is_python))
+            files_to_process += int(np.count_nonzero(should_process))
+            
+            discovered.absolute_paths.extend(batch_paths[:cutoff])
+            discovered.relative_paths.extend(batch_relative[:cutoff])
+            discovered.skip_reasons.extend(skip_reasons)
+            size_batches.append(sizes[:cutoff])
+            process_batches.append(should_process)
+            binary_batches.append(is_binary)
+            python_batches.append(is_python)
+            
+            batch_paths.clear()
+            batch_relative.clear()
+            batch_sizes.clear()
+            batch_python.clear()
+            return files_to_process >= request.max_files
         
         # Walk through all files in repository
-        for file_path in repo_path.rglob("*"):
-            if not file_path.is_file():
-                continue
+        hit_limit = False
+        for file_path, relative_path, size_bytes in self._walk_repository(repo_path, request):
+            batch_paths.append(file_path)
+            batch_relative.append(relative_path)
+            batch_sizes.append(size_bytes)
+            batch_python.append(relative_path.suffix == ".py")
             
-            try:
-                relative_path = file_path.relative_to(repo_path)
-                size_bytes = file_path.stat().st_size
-                
-                discovered_file = DiscoveredFile(
-                    absolute_path=file_path,
-                    relative_path=relative_path,
-                    size_bytes=size_bytes,
-                    is_python=file_path.suffix == ".py"
-                )
-                
-                # Apply filtering logic
-                should_process, skip_reason = self._should_process_file(
-                    relative_path, size_bytes, request
-                )
-                
-                discovered_file.should_process = should_process
-                discovered_file.skip_reason = skip_reason
-                
-                discovered_files.append(discovered_file)
-                
-                # Limit discovery if we hit max files
-                if len([f for f in discovered_files if f.should_process]) >= request.max_files:
-                    self.logger.warning(f"Hit max files limit ({request.max_files}), stopping discovery")
+            if len(batch_paths) >= DISCOVERY_BATCH_SIZE:
+                hit_limit = flush_batch()
+                if hit_limit:
                     break
-                    
-            except Exception as e:
-                self.logger.warning(f"Error processing file {file_path}: {e}")
-                continue
         
-        # Log discovery results
-        total_files = len(discovered_files)
-        python_files = len([f for f in discovered_files if f.is_python])
-        files_to_process = len([f for f in discovered_files if f.should_process])
+        if batch_paths:
+            hit_limit = flush_batch()
+        
+        if hit_limit:
+            self.logger.warning(f"Hit max files limit ({request.max_files}), stopping discovery")
         
+        if size_batches:
+            discovered.sizes = np.concatenate(size_batches)
+            discovered.should_process = np.concatenate(process_batches)
+            discovered.is_binary = np.concatenate(binary_batches)
+            discovered.is_python = np.concatenate(python_batches)
+        
+        # Log discovery results
         self.logger.info(
             f"File discovery: {total_files} total, {python_files} Python, "
             f"{files_to_process} to process"
@@ -356,54 +790,158 @@ class RepositoryProcessor:
                 }
             )
         
-        return discovered_files
+        return discovered
     
-    def _should_process_file(
+    def _walk_repository(
         self,
-        relative_path: Path,
-        size_bytes: int,
+        repo_path: Path,
         request: RepositoryIngestionRequest
-    ) -> Tuple[bool, Optional[str]]:
+    ) -> Iterator[Tuple[Path, Path, int]]:
         """
-        Determine if a file should be processed.
+        Walk the repository, pruning excluded directories before descending.
+        
+        Directories in PRUNE_DIRS, or whose name matches an exclude pattern
+        of the form ``**/<name>/**``, are removed from the walk in place so
+        none of their contents are listed or stat'd. Symlinked directories
+        are not followed.
         
         Args:
-            relative_path: Relative path to file
-            size_bytes: File size in bytes
+            repo_path: Path to repository
             request: Repository ingestion request
             
-        Returns:
-            Tuple[bool, Optional[str]]: (should_process, skip_reason)
+        Yields:
+            Tuple[Path, Path, int]: (absolute_path, relative_path, size_bytes)
+            for every regular file
         """
-        path_str = str(relative_path)
+        dir_exclude_re = _compile_glob_union(
+            _directory_exclude_globs(tuple(request.exclude_patterns))
+        )
         
-        # Check size limits
-        if size_bytes > request.max_file_size:
-            return False, f"File too large: {size_bytes} > {request.max_file_size}"
+        for root, dirs, files in os.walk(repo_path, topdown=True, followlinks=False):
+            dirs[:] = [
+                d for d in dirs
+                if d not in PRUNE_DIRS
+                and not (dir_exclude_re and dir_exclude_re.match(os.path.normcase(d)))
+            ]
+            
+            root_path = Path(root)
+            relative_root = root_path.relative_to(repo_path)
+            
+            for name in files:
+                file_path = root_path / name
+                try:
+                    file_stat = file_path.stat()
+                except OSError as e:
+                    self.logger.warning(f"Error processing file {file_path}: {e}")
+                    continue
+                
+                if not stat.S_ISREG(file_stat.st_mode):
+                    continue
+                
+                yield file_path, relative_root / name, file_stat.st_size
+    
+    def _filter_discovery_batch(
+        self,
+        absolute_paths: List[Path],
+        relative_paths: List[Path],
+        sizes: np.ndarray,
+        request: RepositoryIngestionRequest,
+        remaining: int
+    ) -> Tuple[np.ndarray, np.ndarray, List[Optional[str]], int]:
+        """
+        Decide which files of a discovery batch should be processed.
         
-        if size_bytes == 0:
-            return False, "Empty file"
+        Size limits are evaluated for the whole batch at once; pattern
+        matching only runs for files that pass the size check, and binary
+        sniffing only for files that also match the patterns.
         
-        # Check exclude patterns first
-        for pattern in request.exclude_patterns:
-            if fnmatch.fnmatch(path_str, pattern):
-                return False, f"Excluded by pattern: {pattern}"
+        Args:
+            absolute_paths: Absolute paths of the batch
+            relative_paths: Relative paths of the batch
+            sizes: File sizes in bytes
+            request: Repository ingestion request
+            remaining: Number of files that may still be selected
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray, List[Optional[str]], int]:
+            (should_process, is_binary, skip_reasons, cutoff) truncated to
+            the first ``cutoff`` files
+        """
+        should_process = (sizes > 0) & (sizes <= request.max_file_size)
+        is_binary = np.zeros(len(sizes), dtype=bool)
+        skip_reasons: List[Optional[str]] = [None] * len(sizes)
+        cutoff = len(sizes)
+        selected = 0
         
-        # Check include patterns
-        included = False
-        for pattern in request.include_patterns:
-            if fnmatch.fnmatch(path_str, pattern):
-                included = True
+        for index in range(len(sizes)):
+            if not should_process[index]:
+                size_bytes = int(sizes[index])
+                skip_reasons[index] = (
+                    "Empty file" if size_bytes == 0
+                    else f"File too large: {size_bytes} > {request.max_file_size}"
+                )
+                continue
+            
+            relative_path = relative_paths[index]
+            if relative_path.suffix.lower() in BINARY_EXTENSIONS:
+                should_process[index] = False
+                is_binary[index] = True
+                skip_reasons[index] = "Binary file"
+                continue
+            
+            matched, skip_reason = self._check_patterns(relative_path, request)
+            if not matched:
+                should_process[index] = False
+                skip_reasons[index] = skip_reason
+                continue
+            
+            try:
+                binary = _sniff_binary(absolute_paths[index])
+            except OSError as e:
+                should_process[index] = False
+                skip_reasons[index] = f"Unreadable file: {e}"
+                continue
+            
+            if binary:
+                should_process[index] = False
+                is_binary[index] = True
+                skip_reasons[index] = "Binary file"
+                continue
+            
+            selected += 1
+            if selected >= remaining:
+                cutoff = index + 1
                 break
         
-        if not included:
-            return False, f"Not matched by include patterns: {request.include_patterns}"
+        return should_process[:cutoff], is_binary[:cutoff], skip_reasons[:cutoff], cutoff
+    
+    def _check_patterns(
+        self,
+        relative_path: Path,
+        request: RepositoryIngestionRequest
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Check a file path against the request's include/exclude patterns.
+        
+        Args:
+            relative_path: Relative path to file
+            request: Repository ingestion request
+            
+        Returns:
+            Tuple[bool, Optional[str]]: (matched, skip_reason)
+        """
+        check = _compile_path_predicate(
+            tuple(request.include_patterns), tuple(request.exclude_patterns)
+        )
+        skip_reason = check(os.path.normcase(str(relative_path)))
+        if skip_reason is not None:
+            return False, skip_reason
         
         return True, None
     
     async def _process_files_sync(
         self,
-        discovered_files: List[DiscoveredFile],
+        discovered_files: DiscoveredFiles,
         request: RepositoryIngestionRequest,
         response: RepositoryIngestionResponse,
         trace_id: Optional[str] = None
@@ -419,11 +957,19 @@ class RepositoryProcessor:
         """
         processing_start = time.time()
         
-        files_to_process = [f for f in discovered_files if f.should_process]
+        files_to_process = discovered_files.files_to_process()
         
         # Get memOS client
         memos_client = get_memos_client()
         
+        # Serialize request metadata once for every chunk of every file
+        request_metadata = request.metadata.model_dump()
+        
+        # Relative path of the first file seen with each content hash, and
+        # every result by relative path, for completing duplicate files
+        content_hashes: Dict[str, str] = {}
+        results_by_path: Dict[str, FileProcessingResult] = {}
+        
         # Process files in batches for better performance
         batch_size = 10
         for i in range(0, len(files_to_process), batch_size):
@@ -432,12 +978,15 @@ class RepositoryProcessor:
             # Process batch concurrently
             batch_tasks = []
             for file in batch:
-                task = self._process_single_file(file, request, memos_client, trace_id)
+                task = self._process_single_file(
+                    file, request, memos_client, trace_id, request_metadata, content_hashes
+                )
                 batch_tasks.append(task)
             
             batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
             
             # Process results
+            file_results = []
             for file, result in zip(batch, batch_results):
                 if isinstance(result, Exception):
                     self.logger.error(f"Error processing {file.relative_path}: {result}")
@@ -451,16 +1000,36 @@ class RepositoryProcessor:
                 else:
                     file_result = result
                 
-                response.files_processed.append(file_result)
-                
-                # Log individual file progress
-                await self.progress_logger.log_file_processing_progress(
-                    str(response.ingestion_id),
-                    str(file.relative_path),
-                    len(response.files_processed),
-                    len(files_to_process),
-                    file_result
-                )
+                file_results.append(file_result)
+                results_by_path[file_result.relative_path] = file_result
+            
+            # Duplicates are completed once their batch is done rather than
+            # waiting for the original inside it: they reuse its memory IDs
+            # and are recorded on its result
+            for index, file_result in enumerate(file_results):
+                if file_result.duplicate_of is None:
+                    continue
+                original = results_by_path.get(file_result.duplicate_of)
+                if original is not None and original.status == ProcessingStatus.COMPLETED:
+                    file_result.memory_ids = list(original.memory_ids)
+                    original.duplicate_paths.append(file_result.relative_path)
+                else:
+                    # The original failed; process this copy on its own
+                    file_result = await self._process_single_file(
+                        batch[index], request, memos_client, trace_id, request_metadata
+                    )
+                    file_results[index] = file_result
+                    results_by_path[file_result.relative_path] = file_result
+            
+            response.files_processed.extend(file_results)
+            
+            # Log progress once per batch
+            await self.progress_logger.log_batch_processing_progress(
+                str(response.ingestion_id),
+                len(response.files_processed),
+                len(files_to_process),
+                file_results
+            )
             
             # Log progress
             processed_count = len(response.files_processed)
@@ -480,7 +1049,7 @@ class RepositoryProcessor:
     
     async def _process_files_async(
         self,
-        discovered_files: List[DiscoveredFile],
+        discovered_files: DiscoveredFiles,
         request: RepositoryIngestionRequest,
         response: RepositoryIngestionResponse,
         trace_id: Optional[str] = None
@@ -503,16 +1072,26 @@ class RepositoryProcessor:
         file: DiscoveredFile,
         request: RepositoryIngestionRequest,
         memos_client: MemOSClient,
-        trace_id: Optional[str] = None
+        trace_id: Optional[str] = None,
+        request_metadata: Optional[Dict[str, Any]] = None,
+        content_hashes: Optional[Dict[str, str]] = None
     ) -> FileProcessingResult:
         """
         Process a single file.
         
+        A file whose content is identical to one already seen in the same
+        ingestion is not chunked, embedded, or stored again; its result only
+        names that file in ``duplicate_of`` and is completed by the caller.
+        
         Args:
             file: File to process
             request: Repository ingestion request
             memos_client: memOS client
             trace_id: Optional Langfuse trace ID
+            request_metadata: Pre-serialized request metadata (dumped if None)
+            content_hashes: Per-ingestion map of content hash to the relative
+                path of the first file seen with it (None disables
+                deduplication)
             
         Returns:
             FileProcessingResult: Processing result
@@ -521,8 +1100,25 @@ class RepositoryProcessor:
         
         try:
             # Read file content
-            with open(file.absolute_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            content = _read_text_file(file.absolute_path, file.size_bytes)
+            
+            # Deduplicate identical file contents within this ingestion
+            if content_hashes is not None:
+                content_hash = generate_content_hash(content)
+                relative_path = str(file.relative_path)
+                canonical_path = content_hashes.setdefault(content_hash, relative_path)
+                if canonical_path != relative_path:
+                    self.logger.debug(
+                        f"Skipping duplicate file {relative_path} of {canonical_path}"
+                    )
+                    return FileProcessingResult(
+                        file_path=str(file.absolute_path),
+                        relative_path=relative_path,
+                        file_size=file.size_bytes,
+                        status=ProcessingStatus.COMPLETED,
+                        processing_time_ms=int((time.time() - start_time) * 1000),
+                        duplicate_of=canonical_path
+                    )
             
             # Process with AST parser if Python file
             if file.is_python:
@@ -531,30 +1127,48 @@ class RepositoryProcessor:
                     file_path=str(file.relative_path),
                     content_type="code"
                 )
+                chunks = processing_result['chunks']
+                chunk_stream = _iter_pairs(chunks, processing_result['embeddings'])
             else:
-                # Process as regular text
-                processing_result = await self.content_processor.process_content_with_embeddings(
-                    content=content,
-                    content_type="text"
+                # Process as regular text (prepared exactly as by
+                # process_content_with_embeddings), embedding each group of
+                # chunks while the previous one is stored
+                _, chunks, content_metadata = self.content_processor.prepare_content(
+                    content, "text"
+                )
+                chunk_stream = self.content_processor.iter_chunks_with_embeddings(
+                    chunks=chunks,
+                    content_type="text",
+                    detected_type=content_metadata.get("detected_type")
                 )
             
             # Store chunks in memOS
             memory_ids = []
-            chunks = processing_result['chunks']
-            embeddings = processing_result['embeddings']
+            embeddings_generated = 0
             
-            for i, chunk in enumerate(chunks):
+            if request_metadata is None:
+                request_metadata = request.metadata.model_dump()
+            
+            # Metadata shared by every chunk of this file
+            file_metadata = {
+                "file_path": str(file.relative_path),
+                "file_size": file.size_bytes,
+                "repository_ingestion_id": str(request.metadata.custom_fields.get("ingestion_id", "")),
+                **request_metadata
+            }
+            total_chunks = len(chunks)
+            
+            i = 0
+            async for chunk, embedding in chunk_stream:
+                if embedding is not None:
+                    embeddings_generated += 1
+                
                 try:
-                    embedding = embeddings[i] if i < len(embeddings) else None
-                    
                     # Create metadata for this chunk
                     chunk_metadata = {
-                        "file_path": str(file.relative_path),
+                        **file_metadata,
                         "chunk_index": i,
-                        "total_chunks": len(chunks),
-                        "file_size": file.size_bytes,
-                        "repository_ingestion_id": str(request.metadata.custom_fields.get("ingestion_id", "")),
-                        **request.metadata.model_dump()
+                        "total_chunks": total_chunks
                     }
                     
                     # Store in memOS
@@ -570,6 +1184,8 @@ class RepositoryProcessor:
                         
                 except Exception as e:
                     self.logger.warning(f"Failed to store chunk {i} for {file.relative_path}: {e}")
+                
+                i += 1
             
             processing_time = int((time.time() - start_time) * 1000)
             
@@ -598,7 +1214,7 @@ class RepositoryProcessor:
                 status=ProcessingStatus.COMPLETED,
                 elements_extracted=elements_extracted,
                 chunks_created=len(chunks),
-                embeddings_generated=sum(1 for emb in embeddings if emb is not None),
+                embeddings_generated=embeddings_generated,
                 processing_time_ms=processing_time,
                 complexity_score=complexity_score,
                 memory_ids=memory_ids
@@ -632,47 +1248,63 @@ class RepositoryProcessor:
         Returns:
             RepositoryProcessingSummary: Comprehensive summary
         """
-        # Basic counts
-        total_files_processed = len(file_results)
-        successful_files = [r for r in file_results if r.status == ProcessingStatus.COMPLETED]
-        failed_files = [r for r in file_results if r.status == ProcessingStatus.FAILED]
-        
-        # Aggregate metrics
-        total_elements = sum(r.elements_extracted for r in successful_files)
-        total_chunks = sum(r.chunks_created for r in successful_files)
-        total_embeddings = sum(r.embeddings_generated for r in successful_files)
-        
-        # Complexity analysis
-        complexities = [r.complexity_score for r in successful_files if r.complexity_score > 0]
-        avg_complexity = sum(complexities) / len(complexities) if complexities else 0.0
-        
-        # File type distribution
+        # Aggregate metrics in a single pass over the results
+        successful_count = 0
+        failed_count = 0
+        total_elements = 0
+        total_chunks = 0
+        total_embeddings = 0
+        complexity_sum = 0.0
+        complexity_count = 0
         file_type_dist = defaultdict(int)
+        processing_errors = []
+        
         for result in file_results:
             extension = Path(result.relative_path).suffix or "no_extension"
             file_type_dist[extension] += 1
+            
+            if result.status == ProcessingStatus.COMPLETED:
+                successful_count += 1
+                total_elements += result.elements_extracted
+                total_chunks += result.chunks_created
+                total_embeddings += result.embeddings_generated
+                if result.complexity_score > 0:
+                    complexity_sum += result.complexity_score
+                    complexity_count += 1
+            elif result.status == ProcessingStatus.FAILED:
+                failed_count += 1
+                if result.error_message and len(processing_errors) < 20:  # Limit to 20 errors
+                    processing_errors.append(result.error_message)
         
-        # Find largest and most complex files
-        largest_files = sorted(
-            [{"path": r.relative_path, "size": r.file_size} for r in successful_files],
-            key=lambda x: x["size"],
-            reverse=True
-        )[:10]
+        avg_complexity = complexity_sum / complexity_count if complexity_count else 0.0
         
-        most_complex_files = sorted(
-            [{"path": r.relative_path, "complexity": r.complexity_score} for r in successful_files if r.complexity_score > 0],
-            key=lambda x: x["complexity"],
-            reverse=True
-        )[:10]
+        # Find largest and most complex files (O(N log 10) top-N selection)
+        largest_files = [
+            {"path": r.relative_path, "size": r.file_size}
+            for r in heapq.nlargest(
+                10,
+                (r for r in file_results if r.status == ProcessingStatus.COMPLETED),
+                key=lambda r: r.file_size
+            )
+        ]
         
-        # Collect errors
-        processing_errors = [r.error_message for r in failed_files if r.error_message][:20]  # Limit to 20 errors
+        most_complex_files = [
+            {"path": r.relative_path, "complexity": r.complexity_score}
+            for r in heapq.nlargest(
+                10,
+                (
+                    r for r in file_results
+                    if r.status == ProcessingStatus.COMPLETED and r.complexity_score > 0
+                ),
+                key=lambda r: r.complexity_score
+            )
+        ]
         
         return RepositoryProcessingSummary(
-            total_files_found=total_files_processed,  # This is files processed, not found
-            total_files_processed=len(successful_files),
+            total_files_found=len(file_results),  # This is files processed, not found
+            total_files_processed=successful_count,
             total_files_skipped=0,  # Would need to track skipped files separately
-            total_files_failed=len(failed_files),
+            total_files_failed=failed_count,
             
             total_elements_extracted=total_elements,
             total_chunks_created=total_chunks,
@@ -691,6 +1323,46 @@ class RepositoryProcessor:
         )
 
 
+# Shared process pool for CPU-bound AST parsing
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """
+    Get the shared process pool used for Python AST parsing.
+    
+    Workers are started from a forkserver (spawned where that is not
+    available): by now the server is multi-threaded, and a forked child can
+    inherit a lock some other thread was holding.
+    
+    Returns:
+        ProcessPoolExecutor: Pool of ``parse_pool_max_workers`` processes
+        (the number of CPU cores if unset)
+    """
+    global _parse_pool
+    if _parse_pool is None:
+        start_method = (
+            "forkserver"
+            if "forkserver" in multiprocessing.get_all_start_methods()
+            else "spawn"
+        )
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=settings.parse_pool_max_workers or os.cpu_count(),
+            mp_context=multiprocessing.get_context(start_method)
+        )
+    return _parse_pool
+
+
+def close_parse_pool() -> None:
+    """Shut down the shared parse pool's worker processes, if it was created."""
+    global _parse_pool, _repository_processor
+    pool, _parse_pool = _parse_pool, None
+    # The processor holds the pool; let the next one get a fresh pool
+    _repository_processor = None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 # Global repository processor instance
 _repository_processor: Optional[RepositoryProcessor] = None
 
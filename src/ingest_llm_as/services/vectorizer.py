@@ -5,15 +5,54 @@ This module encapsulates all interaction with the LM Studio SDK for generating
 embeddings using local models (nomic-embed-text, nomic-embed-code).
 """
 
-from typing import List, Optional, Dict, Any
+import asyncio
+import base64
+import re
+from collections import OrderedDict, defaultdict
+from typing import Awaitable, Callable, List, Optional, Dict, Any, Tuple, Union
 from enum import Enum
+import sqlite3
+import threading
 import time
 from uuid import UUID, uuid4
 
 import numpy as np
-from openai import OpenAI
+from openai import APIConnectionError, AsyncOpenAI, RateLimitError
 import httpx
 
+try:
+    import h2  # noqa: F401
+
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+try:
+    from blake3 import blake3 as _cache_hash
+except ImportError:
+    from hashlib import blake2b as _cache_hash
+
+try:
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import cupy as cp
+
+    CUPY_AVAILABLE = True
+except ImportError:
+    CUPY_AVAILABLE = False
+
+try:
+    from datasketch import MinHash, MinHashLSH
+
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    DATASKETCH_AVAILABLE = False
+
 from ..config import settings
 from ..observability.logging import get_logger
 from ..observability.langfuse_client import get_langfuse_client
@@ -29,6 +68,48 @@ class EmbeddingModelType(str, Enum):
     GENERAL = "text-embedding-nomic-embed-text-v1.5@q5_k_m"  # Use your current model as fallback
 
 
+# Lower-cased content types that prefer the code-specialized model
+_CODE_CONTENT_TYPES = frozenset({"code", "python", "javascript", "json"})
+_CODE_DETECTED_TYPES = frozenset({"code", "python", "json"})
+
+
+def _build_model_table(available_models: List[str]) -> Dict[str, tuple]:
+    """
+    Precompute the (model, selection reason) used for code and for text.
+
+    Selection only depends on which models LM Studio serves, so it is
+    decided once when the model list is fetched.
+    """
+    available = frozenset(available_models)
+
+    # For text, documentation, markdown
+    if EmbeddingModelType.TEXT.value in available:
+        text_choice = (
+            EmbeddingModelType.TEXT.value,
+            "text_specialized_model_available",
+        )
+    elif available_models:
+        text_choice = (available_models[0], "fallback_to_first_available")
+        logger.warning("Using fallback model %s", available_models[0])
+    else:
+        text_choice = (
+            EmbeddingModelType.GENERAL.value,
+            "final_fallback_model",
+        )
+        logger.warning("No specialized models available, using general model")
+
+    # Prefer the code-specialized model, otherwise embed code like text
+    if EmbeddingModelType.CODE.value in available:
+        code_choice = (
+            EmbeddingModelType.CODE.value,
+            "code_specialized_model_available",
+        )
+    else:
+        code_choice = text_choice
+
+    return {"code": code_choice, "text": text_choice}
+
+
 class VectorizerError(Exception):
     """Base exception for vectorizer errors."""
 
@@ -47,6 +128,571 @@ class VectorizerAPIError(VectorizerError):
     pass
 
 
+def _cosine_unit_interval_numpy(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine similarity of ``a`` and ``b``, mapped to [0, 1]."""
+    norm_a = float(a @ a)
+    norm_b = float(b @ b)
+    if norm_a == 0.0 or norm_b == 0.0:
+        return 0.0
+    similarity = float(a @ b) / (norm_a * norm_b) ** 0.5
+    return max(0.0, min(1.0, (similarity + 1.0) * 0.5))
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True, fastmath=True)
+    def _cosine_unit_interval(a: np.ndarray, b: np.ndarray) -> float:
+        """Cosine similarity of ``a`` and ``b``, mapped to [0, 1]."""
+        dot = 0.0
+        norm_a = 0.0
+        norm_b = 0.0
+        # Dot product and both norms in one pass over the vectors
+        for i in range(a.shape[0]):
+            dot += a[i] * b[i]
+            norm_a += a[i] * a[i]
+            norm_b += b[i] * b[i]
+        if norm_a == 0.0 or norm_b == 0.0:
+            return 0.0
+        similarity = dot / (norm_a**0.5 * norm_b**0.5)
+        return max(0.0, min(1.0, (similarity + 1.0) * 0.5))
+
+    # Compile at import so the first request doesn't pay for the JIT
+    _cosine_unit_interval(
+        np.ones(2, dtype=np.float32), np.ones(2, dtype=np.float32)
+    )
+else:
+    _cosine_unit_interval = _cosine_unit_interval_numpy
+
+
+def _decode_embedding(value) -> np.ndarray:
+    """Decode an API embedding, base64 float32 bytes or a list of floats."""
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+    # Servers that ignore encoding_format return the plain JSON array
+    return np.asarray(value, dtype=np.float32)
+
+
+def _as_unit_vectors(vectors) -> np.ndarray:
+    """
+    Return ``vectors`` as a read-only, L2-normalized float32 matrix.
+
+    A float32 ndarray is normalized in place rather than copied.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def _gpu_similarity_available() -> bool:
+    """Return True if GPU similarity is enabled and a CUDA device exists."""
+    if not (CUPY_AVAILABLE and settings.enable_gpu_similarity):
+        return False
+    try:
+        return cp.cuda.runtime.getDeviceCount() > 0
+    except cp.cuda.runtime.CUDARuntimeError:
+        return False
+
+
+class GpuSimilarity:
+    """
+    Top-k similarity search over a fixed matrix of normalized embeddings.
+
+    With ``enable_gpu_similarity`` set, CuPy installed and a CUDA device
+    present, the corpus stays resident on the GPU as float16 and each query
+    is one device matmul; otherwise it is a float32 NumPy matrix scored with
+    BLAS. Only worth it for large corpora, where the GPU's memory bandwidth
+    outweighs the per-query transfer.
+    """
+
+    def __init__(self, corpus: np.ndarray):
+        self.on_gpu = _gpu_similarity_available()
+        if self.on_gpu:
+            self._matrix = cp.asarray(corpus, dtype=cp.float16)
+        else:
+            self._matrix = np.ascontiguousarray(corpus, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self._matrix.shape[0]
+
+    def topk(self, query: np.ndarray, k: int) -> tuple:
+        """
+        Find the ``k`` rows most similar to ``query``.
+
+        Args:
+            query: Normalized query embedding
+            k: Number of results
+
+        Returns:
+            tuple: (row indices, similarity scores in [0, 1]), best first
+        """
+        xp = cp if self.on_gpu else np
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        query = xp.asarray(query, dtype=self._matrix.dtype)
+        similarities = self._matrix @ query
+        top = xp.argpartition(-similarities, k - 1)[:k]
+        top = top[xp.argsort(-similarities[top])]
+        scores = xp.clip(
+            (similarities[top].astype(xp.float32) + 1.0) * 0.5, 0.0, 1.0
+        )
+
+        if self.on_gpu:
+            return cp.asnumpy(top), cp.asnumpy(scores)
+        return top, scores
+
+
+def embedding_cache_key(model: str, text: str) -> bytes:
+    """Return the cache key for ``model``'s embedding of ``text``."""
+    # Hash the parts incrementally: joining them first would copy the whole
+    # text once more before it is encoded
+    hasher = _cache_hash(model.encode("utf-8") + b"\0")
+    hasher.update(text.encode("utf-8"))
+    return hasher.digest()
+
+
+# Persistent cache vector encodings; the code is the first byte of each blob
+_VECTOR_ENCODINGS = {"float32": 0, "float16": 1, "int8": 2}
+_CACHE_SCHEMA_VERSION = 1
+# Keys per SELECT, under SQLite's default bound-parameter limit
+_CACHE_LOOKUP_CHUNK = 500
+
+
+def _pack_vector(vector: np.ndarray, encoding: str) -> bytes:
+    """Serialise a float32 vector for the persistent cache."""
+    code = _VECTOR_ENCODINGS[encoding]
+    if encoding == "float16":
+        payload = vector.astype(np.float16).tobytes()
+    elif encoding == "int8":
+        # Symmetric per-vector quantization: the scale is stored up front
+        peak = float(np.abs(vector).max()) if vector.size else 0.0
+        scale = np.float32(peak / 127 if peak > 0 else 1.0)
+        quantized = np.round(vector / scale).astype(np.int8)
+        payload = scale.tobytes() + quantized.tobytes()
+    else:
+        payload = vector.astype(np.float32).tobytes()
+    return bytes((code,)) + payload
+
+
+def _unpack_vector(blob: bytes) -> np.ndarray:
+    """Decode a persistent cache blob back into a read-only float32 vector."""
+    code = blob[0]
+    if code == _VECTOR_ENCODINGS["float16"]:
+        vector = np.frombuffer(blob, dtype=np.float16, offset=1)
+        vector = vector.astype(np.float32)
+    elif code == _VECTOR_ENCODINGS["int8"]:
+        scale = np.frombuffer(blob, dtype=np.float32, count=1, offset=1)[0]
+        vector = np.frombuffer(blob, dtype=np.int8, offset=5)
+        vector = vector.astype(np.float32)
+        vector *= scale
+    else:
+        return np.frombuffer(blob, dtype=np.float32, offset=1)
+    vector.flags.writeable = False
+    return vector
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache.
+
+    A bounded in-process LRU answers repeated lookups without touching the
+    network; an optional SQLite database (WAL mode) keeps vectors across
+    process restarts so re-ingesting unchanged files stays cheap. Database
+    reads and writes run in a worker thread so a disk sync never stalls the
+    event loop.
+
+    Persisted vectors are stored as float16 by default (or int8 with a
+    per-vector scale) to halve or quarter the database size; cosine drift
+    from the rounding is negligible for retrieval. ``memory_encoding`` does
+    the same for the in-process entries, trading a decode on every hit for
+    a larger cache in the same memory.
+
+    With ``fuzzy=True`` (requires ``datasketch``) in-memory entries are also
+    indexed by a MinHash of their character 5-grams, so a small edit such as
+    a typo or whitespace change can reuse the embedding of its near-duplicate.
+    """
+
+    MINHASH_PERMUTATIONS = 128
+    SHINGLE_SIZE = 5
+
+    def __init__(
+        self,
+        capacity: int,
+        db_path: Optional[str] = None,
+        fuzzy: bool = False,
+        fuzzy_threshold: float = 0.98,
+        encoding: str = "float16",
+        memory_encoding: str = "float32",
+    ):
+        for value in (encoding, memory_encoding):
+            if value not in _VECTOR_ENCODINGS:
+                raise ValueError(
+                    f"Unsupported embedding cache encoding: {value}"
+                )
+        self.capacity = capacity
+        self.encoding = encoding
+        self.memory_encoding = memory_encoding
+        # float32 entries are the vectors themselves, others packed blobs
+        self._entries: "OrderedDict[bytes, Union[np.ndarray, bytes]]" = (
+            OrderedDict()
+        )
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        if fuzzy and not DATASKETCH_AVAILABLE:
+            logger.warning(
+                "Fuzzy embedding cache requested but datasketch is not installed"
+            )
+        self.fuzzy_enabled = fuzzy and DATASKETCH_AVAILABLE
+        self.fuzzy_threshold = fuzzy_threshold
+        self._minhashes: Dict[bytes, tuple] = {}
+        # Candidates are banded at the configured threshold so none in
+        # the range the Jaccard check accepts are missed
+        self._lsh = (
+            MinHashLSH(
+                threshold=fuzzy_threshold,
+                num_perm=self.MINHASH_PERMUTATIONS,
+            )
+            if self.fuzzy_enabled
+            else None
+        )
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # In WAL mode NORMAL only syncs at checkpoints; a crash can lose
+            # the latest writes, which is harmless for a cache
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            (version,) = self._db.execute("PRAGMA user_version").fetchone()
+            if version < _CACHE_SCHEMA_VERSION:
+                # Unversioned databases hold raw float32 blobs; start over
+                self._db.execute("DROP TABLE IF EXISTS embeddings")
+                self._db.execute(
+                    f"PRAGMA user_version = {_CACHE_SCHEMA_VERSION}"
+                )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Return the cached vector for ``key``, or None on a miss."""
+        (vector,) = await self.get_many([key])
+        return vector
+
+    async def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Return the cached vectors for ``keys``, None for each miss."""
+        vectors = [self._recall(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if self._db is None or not missing:
+            return vectors
+
+        # One trip to the worker thread for all of the memory misses
+        blobs = await asyncio.to_thread(
+            self._load, [keys[i] for i in missing]
+        )
+        for i in missing:
+            blob = blobs.get(keys[i])
+            if blob is not None:
+                vectors[i] = _unpack_vector(blob)
+                self._remember(keys[i], vectors[i])
+        return vectors
+
+    async def put_many(self, items: List[tuple]) -> None:
+        """Store ``(key, vector)`` pairs in memory and, if enabled, on disk."""
+        for key, vector in items:
+            self._remember(key, vector)
+
+        if self._db is not None and items:
+            await asyncio.to_thread(self._store, items)
+
+    async def put(self, key: bytes, vector: np.ndarray) -> None:
+        """Store a single vector."""
+        await self.put_many([(key, vector)])
+
+    def _recall(self, key: bytes) -> Optional[np.ndarray]:
+        """Return the in-memory vector for ``key``, or None."""
+        vector = self._entries.get(key)
+        if vector is None:
+            return None
+        self._entries.move_to_end(key)
+        if isinstance(vector, bytes):
+            return _unpack_vector(vector)
+        return vector
+
+    def _load(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        """Read the stored blobs for ``keys`` (runs in a worker thread)."""
+        blobs: Dict[bytes, bytes] = {}
+        with self._db_lock:
+            for start in range(0, len(keys), _CACHE_LOOKUP_CHUNK):
+                chunk = keys[start : start + _CACHE_LOOKUP_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                blobs.update(
+                    self._db.execute(
+                        "SELECT key, vector FROM embeddings "
+                        f"WHERE key IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                )
+        return blobs
+
+    def _store(self, items: List[tuple]) -> None:
+        """Write ``(key, vector)`` pairs (runs in a worker thread)."""
+        rows = [
+            (key, _pack_vector(vector, self.encoding))
+            for key, vector in items
+        ]
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                rows,
+            )
+            self._db.commit()
+
+    def get_similar(
+        self, model: str, minhash: "MinHash"
+    ) -> Optional[np.ndarray]:
+        """
+        Return the vector of a cached near-duplicate, if any.
+
+        ``minhash`` comes from ``minhash(text)``, which is CPU-bound and
+        best computed off the event loop.
+        """
+        if not self.fuzzy_enabled:
+            return None
+
+        for key in self._lsh.query(minhash):
+            candidate_model, candidate_hash = self._minhashes[key]
+            if (
+                candidate_model == model
+                and minhash.jaccard(candidate_hash) >= self.fuzzy_threshold
+            ):
+                # Only in-memory entries are indexed
+                return self._recall(key)
+        return None
+
+    def index_similar(
+        self, key: bytes, model: str, minhash: "MinHash"
+    ) -> None:
+        """Make a stored entry discoverable through ``get_similar``."""
+        if not self.fuzzy_enabled or key in self._minhashes:
+            return
+        self._minhashes[key] = (model, minhash)
+        self._lsh.insert(key, minhash)
+
+    def minhash(self, text: str) -> "MinHash":
+        """Return the MinHash of the character shingles of ``text``."""
+        minhash = MinHash(num_perm=self.MINHASH_PERMUTATIONS)
+        size = self.SHINGLE_SIZE
+        # One vectorized update rather than a Python call per shingle
+        minhash.update_batch(
+            [
+                text[i : i + size].encode("utf-8")
+                for i in range(max(1, len(text) - size + 1))
+            ]
+        )
+        return minhash
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        if self.memory_encoding != "float32":
+            vector = _pack_vector(vector, self.memory_encoding)
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            evicted, _ = self._entries.popitem(last=False)
+            if self._minhashes.pop(evicted, None) is not None:
+                self._lsh.remove(evicted)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batch calls.
+
+    Callers ``await submit(text, model)``; a background task drains the queue
+    until ``max_batch_size`` requests are pending or ``max_wait_ms`` has
+    passed since the first one arrived, then issues one concurrent batch call
+    per model so a mixed code/text burst still reaches the right model.
+
+    A batch rejected because of its inputs (a 400 or 413 response, or a
+    context-length error) is split in half and retried, down to single
+    texts, so only the callers whose text actually fails see the error. Any
+    other failure (missing model, server error, connection loss) fails the
+    whole batch at once.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str], str], Awaitable[np.ndarray]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ):
+        self._embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Strong references to dispatched batches until they finish
+        self._inflight: set = set()
+
+    async def submit(self, text: str, model: str) -> np.ndarray:
+        """Queue ``text`` for embedding with ``model`` and await the vector."""
+        loop = asyncio.get_running_loop()
+        if (
+            self._loop is not loop
+            or self._worker is None
+            or self._worker.done()
+        ):
+            # Queues and tasks are bound to the loop that created them
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        self._queue.put_nowait((text, model, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            by_model: Dict[str, list] = defaultdict(list)
+            for item in batch:
+                by_model[item[1]].append(item)
+
+            # Dispatch without waiting, so requests arriving meanwhile form
+            # the next batch while this one is in flight; the request
+            # semaphore caps how many calls reach LM Studio at once
+            for model, items in by_model.items():
+                task = loop.create_task(self._dispatch(model, items))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, model: str, items: list) -> None:
+        try:
+            vectors = await self._embed_batch(
+                [text for text, _, _ in items], model
+            )
+        except Exception as e:
+            if len(items) > 1 and _is_input_error(e):
+                # The batch mixes unrelated callers; split it so one bad
+                # text only fails the request that sent it
+                half = len(items) // 2
+                await asyncio.gather(
+                    self._dispatch(model, items[:half]),
+                    self._dispatch(model, items[half:]),
+                )
+                return
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), vector in zip(items, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+# Transient failures worth retrying (APITimeoutError is an APIConnectionError)
+_RETRYABLE_ERRORS = (APIConnectionError, RateLimitError)
+_CONNECTION_ERRORS = (
+    APIConnectionError,
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    VectorizerConnectionError,
+)
+
+# Statuses a single bad input can cause (malformed or oversized request)
+_INPUT_ERROR_STATUSES = frozenset({400, 413})
+_CONTEXT_LENGTH_RE = re.compile(
+    r"context[ _-]?(length|window)|too many tokens|input is too long",
+    re.IGNORECASE,
+)
+
+EMBEDDING_MAX_ATTEMPTS = 4
+EMBEDDING_RETRY_BASE_DELAY = 0.1
+EMBEDDING_RETRY_MAX_DELAY = 2.0
+
+# Length bucketing: a request's longest text may be at most this many times
+# (and this many tokens more than) its shortest, so little is wasted on padding
+BUCKET_MAX_LENGTH_RATIO = 1.5
+BUCKET_MIN_TOKEN_SPREAD = 64
+
+# Leading characters compared when ordering texts within a request
+PREFIX_SORT_CHARS = 64
+
+# How long a health check result is reused before LM Studio is probed again
+HEALTH_CHECK_TTL = 30.0
+
+
+# Fixed leading tags of the embedding traces
+_EMBEDDING_TRACE_TAGS = ("embedding", "generation")
+_BATCH_TRACE_TAGS = ("embedding", "batch", "generation")
+
+
+def _preview(text: str, limit: int) -> str:
+    """Return ``text`` cut to ``limit`` characters for trace inputs."""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count for ``text`` (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def _is_input_error(error: BaseException) -> bool:
+    """
+    Return True if ``error`` may have been caused by one of the inputs.
+
+    The wrapped cause chain is searched, since the vectorizer re-raises
+    client errors as ``VectorizerAPIError``.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(
+            response, "status_code", None
+        )
+        if status in _INPUT_ERROR_STATUSES:
+            return True
+        if _CONTEXT_LENGTH_RE.search(str(error)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Return the server's Retry-After hint for ``error``, if it sent one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
 class LMStudioVectorizer:
     """
     LM Studio vectorizer client for generating embeddings.
@@ -63,39 +709,288 @@ class LMStudioVectorizer:
             settings.lm_studio_api_key or "not-needed"
         )  # LM Studio doesn't require real API key
 
-        # Initialize OpenAI client pointed to LM Studio
-        self.client = OpenAI(
+        # One long-lived connection pool for every request to LM Studio;
+        # HTTP/2 (when h2 is installed) multiplexes concurrent calls, idle
+        # connections are kept warm between bursts, and failed connects are
+        # retried at the transport before the embedding retry loop sees them
+        self._http = httpx.AsyncClient(
+            timeout=self.timeout,
+            transport=httpx.AsyncHTTPTransport(
+                http2=H2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_keepalive_connections=32,
+                    max_connections=64,
+                    keepalive_expiry=300,
+                ),
+                retries=2,
+            ),
+        )
+
+        # Async OpenAI client pointed to LM Studio
+        self.client = AsyncOpenAI(
             base_url=self.base_url,
             api_key=self.api_key,
             timeout=self.timeout,
+            max_retries=0,
+            http_client=self._http,
+        )
+
+        # Caps concurrent embedding requests so LM Studio isn't flooded
+        self._request_slots = asyncio.Semaphore(
+            settings.embedding_max_inflight_requests
         )
 
         # Model availability cache
-        self._available_models: Optional[List[str]] = None
+        self._available_models: Optional[Tuple[str, ...]] = None
+        self._model_table: Dict[str, tuple] = {}
         self._model_loaded: Optional[str] = None
 
+        # Embedding width per model, learned from responses, and the shared
+        # zero vectors returned for blank input
+        self._model_dimensions: Dict[str, int] = {}
+        self._zero_vectors: Dict[int, np.ndarray] = {}
+
+        # Model selection memo keyed by (content_type, detected_type)
+        self._selected_models: Dict[tuple, str] = {}
+
+        # Consecutive connection failures, and the time until which
+        # embedding calls are skipped once there were too many
+        self._connection_failures = 0
+        self._unavailable_until = 0.0
+
+        # Last health check as (monotonic time, healthy)
+        self._health_cache: Optional[Tuple[float, bool]] = None
+
+        # Embedding cache keyed by hash(model, text)
+        self._cache = EmbeddingCache(
+            capacity=settings.embedding_cache_size,
+            db_path=settings.embedding_cache_path,
+            encoding=settings.embedding_cache_encoding,
+            memory_encoding=settings.embedding_cache_memory_encoding,
+            fuzzy=settings.fuzzy_cache_enabled,
+            fuzzy_threshold=settings.fuzzy_cache_threshold,
+        )
+
+        # Coalesces concurrent generate_content_embedding calls
+        self.batcher = EmbeddingBatcher(
+            self.generate_embeddings_batch,
+            max_batch_size=settings.embedding_coalesce_max_size,
+            max_wait_ms=settings.embedding_coalesce_max_wait_ms,
+        )
+
     async def health_check(self) -> bool:
         """
         Check if LM Studio server is healthy and reachable.
 
+        The result is reused for ``HEALTH_CHECK_TTL`` seconds so repeated
+        checks don't each cost a round-trip.
+
         Returns:
             bool: True if LM Studio is healthy, False otherwise
         """
+        now = time.monotonic()
+        if (
+            self._health_cache is not None
+            and now - self._health_cache[0] < HEALTH_CHECK_TTL
+        ):
+            return self._health_cache[1]
+
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                # LM Studio doesn't have /health, use /models instead (base_url includes /v1)
-                response = await client.get(f"{self.base_url}/models")
-                return response.status_code == 200
+            # LM Studio doesn't have /health, use /models instead (base_url includes /v1)
+            response = await self._http.get(
+                f"{self.base_url}/models", timeout=5.0
+            )
+            healthy = response.status_code == 200
         except Exception as e:
-            logger.warning(f"LM Studio health check failed: {e}")
+            logger.warning("LM Studio health check failed: %s", e)
+            healthy = False
+
+        self._health_cache = (now, healthy)
+        return healthy
+
+    async def _create_embeddings(self, texts: List[str], model: str):
+        """
+        Call the embeddings endpoint, retrying transient failures.
+
+        Connection errors, timeouts and rate limits are retried with
+        exponential backoff, honouring the server's Retry-After header.
+        """
+        delay = EMBEDDING_RETRY_BASE_DELAY
+        for attempt in range(1, EMBEDDING_MAX_ATTEMPTS + 1):
+            try:
+                async with self._request_slots:
+                    return await self.client.embeddings.create(
+                        input=texts, model=model, encoding_format="base64"
+                    )
+            except _RETRYABLE_ERRORS as e:
+                if attempt == EMBEDDING_MAX_ATTEMPTS:
+                    raise
+                wait = _retry_after_seconds(e) or delay
+                logger.warning(
+                    "Embedding request failed (%s), retrying in %.2fs "
+                    "(attempt %d/%d)",
+                    type(e).__name__,
+                    wait,
+                    attempt,
+                    EMBEDDING_MAX_ATTEMPTS,
+                )
+                await asyncio.sleep(min(wait, self.timeout))
+                delay = min(delay * 2, EMBEDDING_RETRY_MAX_DELAY)
+
+    async def _embed_texts(
+        self, texts: List[str], model: str
+    ) -> Tuple[np.ndarray, float]:
+        """
+        Embed ``texts`` in length-bucketed requests dispatched concurrently.
+
+        Inputs are sorted by approximate token count and grouped so that
+        each request holds texts of similar length (LM Studio pads every
+        input to the longest one in the request), at most
+        ``embedding_request_max_size`` of them and, once padded, at most
+        ``embedding_request_token_budget`` tokens. A text over the budget
+        goes in a request of its own. Up to
+        ``embedding_max_inflight_requests`` requests run at once, and each
+        response is scattered back to the original order as it arrives.
+
+        Returns:
+            Tuple of the normalized embedding matrix and the padding ratio
+            (real tokens / padded tokens sent, 1.0 meaning no padding)
+        """
+        size = settings.embedding_request_max_size
+        budget = settings.embedding_request_token_budget
+        buckets: List[List[int]] = []
+        bucket: List[int] = []
+        floor = 0
+        real_tokens = 0
+        padded_tokens = 0
+        for i in sorted(range(len(texts)), key=lambda i: len(texts[i])):
+            tokens = _estimate_tokens(texts[i])
+            # Sorted ascending, so this text sets the bucket's padded length
+            if bucket and (
+                len(bucket) == size
+                or (len(bucket) + 1) * tokens > budget
+                or (
+                    tokens > floor * BUCKET_MAX_LENGTH_RATIO
+                    and tokens - floor > BUCKET_MIN_TOKEN_SPREAD
+                )
+            ):
+                buckets.append(bucket)
+                padded_tokens += len(bucket) * ceiling
+                bucket = []
+            if not bucket:
+                floor = tokens
+            bucket.append(i)
+            ceiling = tokens
+            real_tokens += tokens
+        if bucket:
+            buckets.append(bucket)
+            padded_tokens += len(bucket) * ceiling
+
+        # Within a request, order texts so shared leading text (license
+        # headers, imports, ...) sits together for LM Studio's prefix cache
+        for indices in buckets:
+            indices.sort(key=lambda i: texts[i][:PREFIX_SORT_CHARS])
+
+        async def embed_bucket(indices: List[int]):
+            response = await self._create_embeddings(
+                [texts[i] for i in indices], model
+            )
+            # A short response would leave other texts' rows unfilled
+            if len(response.data) != len(indices):
+                raise VectorizerAPIError(
+                    f"LM Studio returned {len(response.data)} embeddings "
+                    f"for {len(indices)} inputs"
+                )
+            return indices, response
+
+        # Decode each response as soon as it lands rather than after the
+        # slowest one; if any request fails the others are cancelled
+        tasks = [asyncio.create_task(embed_bucket(ix)) for ix in buckets]
+        matrix: Optional[np.ndarray] = None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, response = await next_done
+                for item in response.data:
+                    vector = _decode_embedding(item.embedding)
+                    if matrix is None:
+                        # The first vector fixes the width of the result;
+                        # rows stay NaN until their embedding arrives
+                        matrix = np.full(
+                            (len(texts), vector.shape[0]),
+                            np.nan,
+                            dtype=np.float32,
+                        )
+                    # Items carry their input position; don't trust order
+                    matrix[indices[item.index]] = vector
+        finally:
+            for task in tasks:
+                task.cancel()
+        if matrix is not None and np.isnan(matrix[:, 0]).any():
+            raise VectorizerAPIError(
+                "LM Studio response did not cover every input"
+            )
+        matrix = _as_unit_vectors(matrix)
+        self._model_dimensions[model] = matrix.shape[1]
+        return matrix, real_tokens / padded_tokens if padded_tokens else 1.0
+
+    def _zero_vector_for(self, model: str) -> np.ndarray:
+        """Return a shared, read-only zero vector as wide as ``model``'s."""
+        dimension = self._model_dimensions.get(
+            model, settings.embedding_dimension
+        )
+        zero = self._zero_vectors.get(dimension)
+        if zero is None:
+            zero = np.zeros(dimension, dtype=np.float32)
+            zero.flags.writeable = False
+            self._zero_vectors[dimension] = zero
+        return zero
+
+    async def aclose(self) -> None:
+        """Close the pooled connections to LM Studio."""
+        await self._http.aclose()
+
+    def is_healthy(self) -> bool:
+        """
+        Return False while backing off after repeated connection failures.
+
+        Once ``lm_studio_failure_threshold`` consecutive calls have failed to
+        connect, calls are skipped for ``lm_studio_retry_after_seconds``.
+        When that window ends a single caller is let through as a probe and
+        the window is re-armed for everyone else until the probe succeeds.
+
+        Returns:
+            bool: Whether embedding calls should currently be attempted
+        """
+        if self._connection_failures < settings.lm_studio_failure_threshold:
+            return True
+        now = time.monotonic()
+        if now < self._unavailable_until:
             return False
+        self._unavailable_until = now + settings.lm_studio_retry_after_seconds
+        return True
+
+    def mark_unavailable(self) -> None:
+        """Record a failed connection, backing off after too many in a row."""
+        self._connection_failures += 1
+        if self._connection_failures >= settings.lm_studio_failure_threshold:
+            self._unavailable_until = (
+                time.monotonic() + settings.lm_studio_retry_after_seconds
+            )
 
-    def get_available_models(self) -> List[str]:
+    def mark_available(self) -> None:
+        """Record a successful call, ending any back-off."""
+        self._connection_failures = 0
+        self._unavailable_until = 0.0
+
+    async def get_available_models(self) -> Tuple[str, ...]:
         """
-        Get list of available embedding models from LM Studio.
+        Get the available embedding models from LM Studio.
+
+        The list is fetched once and kept; call refresh_models() after
+        loading or unloading models in LM Studio.
 
         Returns:
-            List[str]: Available model names
+            Tuple[str, ...]: Available model names
 
         Raises:
             VectorizerConnectionError: If unable to connect to LM Studio
@@ -103,23 +998,43 @@ class LMStudioVectorizer:
         """
         try:
             if self._available_models is None:
-                models_response = self.client.models.list()
-                self._available_models = [
+                models_response = await self.client.models.list()
+                self._available_models = tuple(
                     model.id for model in models_response.data
-                ]
+                )
+                self._model_table = _build_model_table(self._available_models)
                 logger.info(
-                    f"Available LM Studio models: {self._available_models}"
+                    "Available LM Studio models: %s", self._available_models
                 )
 
             return self._available_models
 
         except Exception as e:
-            logger.error(f"Failed to get available models from LM Studio: {e}")
+            logger.error(
+                "Failed to get available models from LM Studio: %s", e
+            )
             raise VectorizerConnectionError(
                 f"Unable to connect to LM Studio: {e}"
             )
 
-    def select_model_for_content(
+    async def refresh_models(self) -> Tuple[str, ...]:
+        """
+        Re-read the available models from LM Studio.
+
+        Drops the memoized model selections, so later embeddings pick up a
+        newly loaded model.
+
+        Returns:
+            Tuple[str, ...]: Available model names
+
+        Raises:
+            VectorizerConnectionError: If unable to connect to LM Studio
+        """
+        self._available_models = None
+        self._selected_models.clear()
+        return await self.get_available_models()
+
+    async def select_model_for_content(
         self, content_type: str, detected_type: str = None
     ) -> str:
         """
@@ -135,6 +1050,12 @@ class LMStudioVectorizer:
         Returns:
             str: Selected model name
         """
+        # The available models are fetched once, so a selection never changes
+        selection_key = (content_type, detected_type)
+        selected_model = self._selected_models.get(selection_key)
+        if selected_model is not None:
+            return selected_model
+
         langfuse_client = get_langfuse_client()
 
         # Create Langfuse trace for model selection
@@ -154,47 +1075,20 @@ class LMStudioVectorizer:
                 },
             )
 
-        available_models = self.get_available_models()
-        selected_model = None
-        selection_reason = ""
+        available_models = await self.get_available_models()
 
         # Priority selection based on content analysis
-        if content_type.lower() in [
-            "code",
-            "python",
-            "javascript",
-            "json",
-        ] or (detected_type and detected_type.lower() in ["code", "python"]):
-            # Prefer code-specialized model
-            if EmbeddingModelType.CODE.value in available_models:
-                selected_model = EmbeddingModelType.CODE.value
-                selection_reason = "code_specialized_model_available"
-                logger.debug(f"Selected {selected_model} for code content")
-
-        # For text, documentation, markdown
-        if (
-            not selected_model
-            and EmbeddingModelType.TEXT.value in available_models
-        ):
-            selected_model = EmbeddingModelType.TEXT.value
-            selection_reason = "text_specialized_model_available"
-            logger.debug(f"Selected {selected_model} for text content")
-
-        # Fallback to first available model
-        if not selected_model and available_models:
-            selected_model = available_models[0]
-            selection_reason = "fallback_to_first_available"
-            logger.warning(
-                f"Using fallback model {selected_model} for content type {content_type}"
-            )
-
-        # Final fallback
-        if not selected_model:
-            selected_model = EmbeddingModelType.GENERAL.value
-            selection_reason = "final_fallback_model"
-            logger.warning(
-                "No specialized models available, using general model"
-            )
+        is_code = content_type.lower() in _CODE_CONTENT_TYPES or bool(
+            detected_type and detected_type.lower() in _CODE_DETECTED_TYPES
+        )
+        selected_model, selection_reason = self._model_table[
+            "code" if is_code else "text"
+        ]
+        logger.debug(
+            "Selected %s for %s content",
+            selected_model,
+            "code" if is_code else "text",
+        )
 
         # Update Langfuse trace with selection result
         if langfuse_client.enabled and trace_id:
@@ -203,7 +1097,7 @@ class LMStudioVectorizer:
                 output={
                     "selected_model": selected_model,
                     "selection_reason": selection_reason,
-                    "available_models": available_models,
+                    "available_models": list(available_models),
                 },
             )
 
@@ -222,15 +1116,16 @@ class LMStudioVectorizer:
                 comment=f"Model selection: {selection_reason}",
             )
 
+        self._selected_models[selection_key] = selected_model
         return selected_model
 
-    def generate_embedding(
+    async def generate_embedding(
         self,
         text: str,
         model: Optional[str] = None,
         content_type: str = "text",
         detected_type: str = None,
-    ) -> List[float]:
+    ) -> np.ndarray:
         """
         Generate embedding for the given text using LM Studio.
 
@@ -241,18 +1136,19 @@ class LMStudioVectorizer:
             detected_type: Auto-detected content type
 
         Returns:
-            List[float]: Embedding vector
+            np.ndarray: L2-normalized float32 embedding vector (read-only)
 
         Raises:
             VectorizerConnectionError: If unable to connect to LM Studio
             VectorizerAPIError: If embedding generation fails
         """
         langfuse_client = get_langfuse_client()
+        lf_enabled = langfuse_client.enabled
         start_time = time.time()
 
         # Create Langfuse trace for embedding generation
         trace_id = None
-        if langfuse_client.enabled:
+        if lf_enabled:
             trace_id = langfuse_client.create_trace(
                 name="embedding_generation",
                 metadata={
@@ -263,15 +1159,12 @@ class LMStudioVectorizer:
                     "embedding_provider": "lm_studio",
                 },
                 tags=[
-                    "embedding",
-                    "generation",
+                    *_EMBEDDING_TRACE_TAGS,
                     content_type,
                     model or "auto_select",
                 ],
                 input_data={
-                    "content_preview": text[:100] + "..."
-                    if len(text) > 100
-                    else text,
+                    "content_preview": _preview(text, 100),
                     "content_length": len(text),
                     "content_type": content_type,
                     "detected_type": detected_type,
@@ -282,41 +1175,81 @@ class LMStudioVectorizer:
         try:
             # Auto-select model if not specified
             if model is None:
-                model = self.select_model_for_content(
+                model = await self.select_model_for_content(
                     content_type, detected_type
                 )
 
             logger.debug(
-                f"Generating embedding with model {model} for {len(text)} chars"
+                "Generating embedding with model %s for %d chars",
+                model,
+                len(text),
             )
 
-            # Record model selection in trace
-            if langfuse_client.enabled and trace_id:
-                langfuse_client.client.generation(
-                    trace_id=trace_id,
-                    name="model_selection",
-                    model=model,
-                    input={
-                        "content_type": content_type,
-                        "detected_type": detected_type,
-                    },
-                    output={"selected_model": model},
+            # Blank input has nothing to embed; don't spend a round-trip on it
+            if not text or text.isspace():
+                zero = self._zero_vector_for(model)
+                if lf_enabled and trace_id:
+                    langfuse_client.client.trace(
+                        id=trace_id,
+                        output={
+                            "embedding_dimensions": len(zero),
+                            "model_used": model,
+                            "blank_input": True,
+                            "success": True,
+                        },
+                    )
+                return zero
+
+            cache_key = embedding_cache_key(model, text)
+            cached = await self._cache.get(cache_key)
+            cache_hit = "exact"
+            minhash = None
+            if cached is None and self._cache.fuzzy_enabled:
+                # Shingling costs about a hash per character; keep it off
+                # the event loop
+                minhash = await asyncio.to_thread(self._cache.minhash, text)
+                cached = self._cache.get_similar(model, minhash)
+                cache_hit = "fuzzy"
+            if cached is not None:
+                logger.debug(
+                    "Embedding cache hit (%s) for %d chars",
+                    cache_hit,
+                    len(text),
                 )
+                if lf_enabled and trace_id:
+                    langfuse_client.client.trace(
+                        id=trace_id,
+                        output={
+                            "embedding_dimensions": len(cached),
+                            "model_used": model,
+                            "cache_hit": cache_hit,
+                            "success": True,
+                        },
+                    )
+                return cached
 
             # Generate embedding using OpenAI-compatible API
             api_start_time = time.time()
-            response = self.client.embeddings.create(input=[text], model=model)
+            response = await self._create_embeddings([text], model)
             api_duration = time.time() - api_start_time
 
-            embedding = response.data[0].embedding
+            embedding = _as_unit_vectors(
+                [_decode_embedding(response.data[0].embedding)]
+            )[0]
+            self._model_dimensions[model] = embedding.shape[0]
+            await self._cache.put(cache_key, embedding)
+            if minhash is not None:
+                self._cache.index_similar(cache_key, model, minhash)
             total_duration = time.time() - start_time
 
             logger.debug(
-                f"Generated embedding with {len(embedding)} dimensions in {total_duration:.3f}s"
+                "Generated embedding with %d dimensions in %.3fs",
+                len(embedding),
+                total_duration,
             )
 
             # Record successful embedding generation in Langfuse
-            if langfuse_client.enabled and trace_id:
+            if lf_enabled and trace_id:
                 langfuse_client.client.trace(
                     id=trace_id,
                     output={
@@ -369,7 +1302,7 @@ class LMStudioVectorizer:
             logger.error(error_msg)
 
             # Record error in Langfuse
-            if langfuse_client.enabled and trace_id:
+            if lf_enabled and trace_id:
                 langfuse_client.client.trace(
                     id=trace_id,
                     output={
@@ -391,18 +1324,72 @@ class LMStudioVectorizer:
                     comment=f"Failed: {str(e)}",
                 )
 
-            if "connection" in str(e).lower():
-                raise VectorizerConnectionError(error_msg)
-            else:
-                raise VectorizerAPIError(error_msg)
+            if isinstance(e, _CONNECTION_ERRORS):
+                raise VectorizerConnectionError(error_msg) from e
+            raise VectorizerAPIError(error_msg) from e
+
+    async def _partition_cached(
+        self, texts: List[str], model: str
+    ) -> Tuple[
+        List[bytes],
+        List[Optional[np.ndarray]],
+        List[int],
+        List[int],
+        Dict[int, "MinHash"],
+    ]:
+        """
+        Split a batch into cache hits, misses and blank inputs.
+
+        Args:
+            texts: Texts to look up
+            model: Model the embeddings belong to
+
+        Returns:
+            Tuple of (cache_keys, rows, miss_indices, blank_indices,
+            minhashes). ``rows`` is aligned with ``texts`` and holds the
+            cached vector for hits and None for misses and blanks, so
+            results can be spliced back into position. ``minhashes`` maps
+            the misses to their MinHash when the fuzzy cache is enabled, for
+            indexing once they are embedded.
+        """
+        cache_keys = [embedding_cache_key(model, text) for text in texts]
+        rows: List[Optional[np.ndarray]] = [None] * len(texts)
+        # Blank texts get zero vectors once the model's width is known
+        blank_indices = [
+            i for i, text in enumerate(texts) if not text or text.isspace()
+        ]
+        blank = set(blank_indices)
+        lookup_indices = [i for i in range(len(texts)) if i not in blank]
+        cached = await self._cache.get_many(
+            [cache_keys[i] for i in lookup_indices]
+        )
+        miss_indices = []
+        for i, vector in zip(lookup_indices, cached):
+            rows[i] = vector
+            if vector is None:
+                miss_indices.append(i)
+
+        minhashes: Dict[int, "MinHash"] = {}
+        if miss_indices and self._cache.fuzzy_enabled:
+            # Shingle every miss in one trip off the event loop
+            minhash = self._cache.minhash
+            computed = await asyncio.to_thread(
+                lambda: [minhash(texts[i]) for i in miss_indices]
+            )
+            minhashes = dict(zip(miss_indices, computed))
+            for i in miss_indices:
+                rows[i] = self._cache.get_similar(model, minhashes[i])
+            miss_indices = [i for i in miss_indices if rows[i] is None]
 
-    def generate_embeddings_batch(
+        return cache_keys, rows, miss_indices, blank_indices, minhashes
+
+    async def generate_embeddings_batch(
         self,
         texts: List[str],
         model: Optional[str] = None,
         content_type: str = "text",
         detected_type: str = None,
-    ) -> List[List[float]]:
+    ) -> np.ndarray:
         """
         Generate embeddings for multiple texts in a single batch.
 
@@ -413,22 +1400,22 @@ class LMStudioVectorizer:
             detected_type: Auto-detected content type
 
         Returns:
-            List[List[float]]: List of embedding vectors
+            np.ndarray: L2-normalized float32 matrix, one row per text
 
         Raises:
             VectorizerConnectionError: If unable to connect to LM Studio
             VectorizerAPIError: If embedding generation fails
         """
         langfuse_client = get_langfuse_client()
+        lf_enabled = langfuse_client.enabled
         start_time = time.time()
 
-        # Calculate batch statistics
-        total_chars = sum(len(text) for text in texts)
-        avg_text_length = total_chars / len(texts) if texts else 0
-
-        # Create Langfuse trace for batch embedding generation
+        # Create Langfuse trace for batch embedding generation; the batch
+        # statistics are only needed for tracing
         trace_id = None
-        if langfuse_client.enabled:
+        if lf_enabled:
+            total_chars = sum(len(text) for text in texts)
+            avg_text_length = total_chars / len(texts) if texts else 0
             trace_id = langfuse_client.create_trace(
                 name="batch_embedding_generation",
                 metadata={
@@ -441,9 +1428,7 @@ class LMStudioVectorizer:
                     "embedding_provider": "lm_studio",
                 },
                 tags=[
-                    "embedding",
-                    "batch",
-                    "generation",
+                    *_BATCH_TRACE_TAGS,
                     content_type,
                     f"batch_size_{len(texts)}",
                 ],
@@ -455,8 +1440,7 @@ class LMStudioVectorizer:
                     "detected_type": detected_type,
                     "specified_model": model,
                     "sample_texts": [
-                        text[:50] + "..." if len(text) > 50 else text
-                        for text in texts[:3]
+                        _preview(text, 50) for text in texts[:3]
                     ],
                 },
             )
@@ -464,41 +1448,88 @@ class LMStudioVectorizer:
         try:
             # Auto-select model if not specified
             if model is None:
-                model = self.select_model_for_content(
+                model = await self.select_model_for_content(
                     content_type, detected_type
                 )
 
             logger.debug(
-                f"Generating {len(texts)} embeddings with model {model}"
+                "Generating %d embeddings with model %s", len(texts), model
+            )
+
+            # Serve what we can from cache and only send the misses
+            cache_keys, rows, miss_indices, blank_indices, minhashes = (
+                await self._partition_cached(texts, model)
             )
 
             # Generate embeddings using batch API
             api_start_time = time.time()
-            response = self.client.embeddings.create(input=texts, model=model)
+            padding_ratio = 1.0
+            dedup_ratio = 0.0
+            if miss_indices:
+                # Embed each distinct text once (license headers, boilerplate
+                # imports, ...) and share the vector between its duplicates
+                first_miss: Dict[str, int] = {}
+                for i in miss_indices:
+                    first_miss.setdefault(texts[i], i)
+                unique_indices = list(first_miss.values())
+                dedup_ratio = 1 - len(unique_indices) / len(miss_indices)
+
+                fresh, padding_ratio = await self._embed_texts(
+                    [texts[i] for i in unique_indices], model
+                )
+                for i, vector in zip(unique_indices, fresh):
+                    rows[i] = vector
+                for i in miss_indices:
+                    rows[i] = rows[first_miss[texts[i]]]
+
+                await self._cache.put_many(
+                    [(cache_keys[i], rows[i]) for i in unique_indices]
+                )
+                for i in unique_indices:
+                    if i in minhashes:
+                        self._cache.index_similar(
+                            cache_keys[i], model, minhashes[i]
+                        )
             api_duration = time.time() - api_start_time
 
-            embeddings = [item.embedding for item in response.data]
+            if blank_indices:
+                for row in rows:
+                    if row is not None:
+                        self._model_dimensions.setdefault(model, row.shape[0])
+                        break
+                zero = self._zero_vector_for(model)
+                for i in blank_indices:
+                    rows[i] = zero
+
+            embeddings = (
+                np.stack(rows)
+                if rows
+                else np.empty((0, settings.embedding_dimension), np.float32)
+            )
+
             total_duration = time.time() - start_time
 
             logger.debug(
-                f"Generated {len(embeddings)} embeddings in {total_duration:.3f}s"
-            )
-
-            # Calculate batch efficiency metrics
-            chars_per_second = (
-                total_chars / total_duration if total_duration > 0 else 0
-            )
-            embeddings_per_second = (
-                len(embeddings) / total_duration if total_duration > 0 else 0
-            )
-            avg_embedding_dims = (
-                sum(len(emb) for emb in embeddings) / len(embeddings)
-                if embeddings
-                else 0
+                "Generated %d embeddings in %.3fs",
+                len(embeddings),
+                total_duration,
             )
 
             # Record successful batch generation in Langfuse
-            if langfuse_client.enabled and trace_id:
+            if lf_enabled and trace_id:
+                # Calculate batch efficiency metrics
+                chars_per_second = (
+                    total_chars / total_duration if total_duration > 0 else 0
+                )
+                embeddings_per_second = (
+                    len(embeddings) / total_duration
+                    if total_duration > 0
+                    else 0
+                )
+                avg_embedding_dims = (
+                    embeddings.shape[1] if len(embeddings) else 0
+                )
+
                 langfuse_client.client.trace(
                     id=trace_id,
                     output={
@@ -508,6 +1539,13 @@ class LMStudioVectorizer:
                         "api_duration_ms": int(api_duration * 1000),
                         "total_duration_ms": int(total_duration * 1000),
                         "success": True,
+                        "cache_hits": len(texts)
+                        - len(miss_indices)
+                        - len(blank_indices),
+                        "cache_misses": len(miss_indices),
+                        "padding_ratio": padding_ratio,
+                        "dedup_ratio": dedup_ratio,
+                        "blank_inputs": len(blank_indices),
                         "batch_efficiency": {
                             "chars_per_second": chars_per_second,
                             "embeddings_per_second": embeddings_per_second,
@@ -561,7 +1599,7 @@ class LMStudioVectorizer:
             logger.error(error_msg)
 
             # Record error in Langfuse
-            if langfuse_client.enabled and trace_id:
+            if lf_enabled and trace_id:
                 langfuse_client.client.trace(
                     id=trace_id,
                     output={
@@ -584,13 +1622,15 @@ class LMStudioVectorizer:
                     comment=f"Batch failed: {str(e)}",
                 )
 
-            if "connection" in str(e).lower():
-                raise VectorizerConnectionError(error_msg)
-            else:
-                raise VectorizerAPIError(error_msg)
+            if isinstance(e, _CONNECTION_ERRORS):
+                raise VectorizerConnectionError(error_msg) from e
+            raise VectorizerAPIError(error_msg) from e
 
     def calculate_similarity(
-        self, embedding1: List[float], embedding2: List[float]
+        self,
+        embedding1: List[float],
+        embedding2: List[float],
+        pre_normalized: bool = False,
     ) -> float:
         """
         Calculate cosine similarity between two embeddings.
@@ -598,31 +1638,86 @@ class LMStudioVectorizer:
         Args:
             embedding1: First embedding vector
             embedding2: Second embedding vector
+            pre_normalized: Both vectors are already L2-normalized, as
+                returned by generate_embedding, so the cosine is a plain
+                dot product
 
         Returns:
             float: Cosine similarity score (0-1)
         """
         try:
-            vec1 = np.array(embedding1)
-            vec2 = np.array(embedding2)
-
-            # Calculate cosine similarity
-            dot_product = np.dot(vec1, vec2)
-            norms = np.linalg.norm(vec1) * np.linalg.norm(vec2)
+            vec1 = np.asarray(embedding1, dtype=np.float32)
+            vec2 = np.asarray(embedding2, dtype=np.float32)
 
-            if norms == 0:
-                return 0.0
+            if vec1.shape != vec2.shape or vec1.ndim != 1:
+                raise ValueError(
+                    f"shapes {vec1.shape} and {vec2.shape} not aligned"
+                )
 
-            similarity = dot_product / norms
+            if pre_normalized:
+                similarity = float(vec1 @ vec2)
+                return max(0.0, min(1.0, (similarity + 1.0) * 0.5))
 
-            # Ensure result is in [0, 1] range
-            return max(0.0, min(1.0, (similarity + 1) / 2))
+            return float(_cosine_unit_interval(vec1, vec2))
 
         except Exception as e:
-            logger.error(f"Failed to calculate similarity: {e}")
+            logger.error("Failed to calculate similarity: %s", e)
             return 0.0
 
-    def get_embedding_info(
+    def calculate_similarities(
+        self, query: np.ndarray, matrix: np.ndarray
+    ) -> np.ndarray:
+        """
+        Calculate similarities between one embedding and many at once.
+
+        Scores the whole matrix with a single matrix-vector product instead
+        of calling calculate_similarity per row. ``query`` and the rows of
+        ``matrix`` must be L2-normalized, as returned by generate_embedding
+        and generate_embeddings_batch.
+
+        Args:
+            query: Normalized query embedding
+            matrix: Normalized embeddings, one per row
+
+        Returns:
+            np.ndarray: Similarity scores (0-1), one per row of ``matrix``
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        similarities = matrix @ np.asarray(query, dtype=np.float32)
+
+        # Map cosine similarity from [-1, 1] to [0, 1] without temporaries
+        similarities += 1.0
+        similarities *= 0.5
+        return np.clip(similarities, 0.0, 1.0, out=similarities)
+
+    def most_similar(
+        self, query: np.ndarray, matrix: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the ``k`` rows of ``matrix`` most similar to ``query``.
+
+        One matrix-vector product plus a partial sort, so it replaces loops
+        over calculate_similarity. For repeated queries against the same
+        large corpus, GpuSimilarity keeps the matrix resident instead.
+
+        Args:
+            query: Normalized query embedding
+            matrix: Normalized embeddings, one per row
+            k: Number of results
+
+        Returns:
+            Tuple of (row indices, similarity scores in [0, 1]), best first
+        """
+        similarities = self.calculate_similarities(query, matrix)
+        k = min(k, len(similarities))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return top, similarities[top]
+
+    async def get_embedding_info(
         self, model: Optional[str] = None
     ) -> Dict[str, Any]:
         """
@@ -635,37 +1730,52 @@ class LMStudioVectorizer:
             Dict[str, Any]: Model information
         """
         if model is None:
-            model = self.select_model_for_content("text")
+            model = await self.select_model_for_content("text")
 
         return {
             "model": model,
             "provider": "lm-studio",
             "local": True,
-            "available_models": self.get_available_models(),
+            "available_models": list(await self.get_available_models()),
             "base_url": self.base_url,
         }
 
 
 # Global vectorizer instance
 _vectorizer: Optional[LMStudioVectorizer] = None
+_vectorizer_lock = threading.Lock()
 
 
 def get_vectorizer() -> LMStudioVectorizer:
     """
     Get the global LM Studio vectorizer instance.
 
+    Creation is guarded by a lock so callers on executor threads can't build
+    a second instance, with its own connection pool, cache and batcher.
+
     Returns:
         LMStudioVectorizer: Configured vectorizer instance
     """
     global _vectorizer
     if _vectorizer is None:
-        _vectorizer = LMStudioVectorizer()
+        with _vectorizer_lock:
+            if _vectorizer is None:
+                _vectorizer = LMStudioVectorizer()
     return _vectorizer
 
 
+async def close_vectorizer() -> None:
+    """Close the global vectorizer's connections, if it was created."""
+    global _vectorizer
+    with _vectorizer_lock:
+        vectorizer, _vectorizer = _vectorizer, None
+    if vectorizer is not None:
+        await vectorizer.aclose()
+
+
 async def generate_content_embedding(
     content: str, content_type: str = "text", detected_type: str = None
-) -> Optional[List[float]]:
+) -> Optional[np.ndarray]:
     """
     Convenience function to generate embedding for content.
 
@@ -675,24 +1785,90 @@ async def generate_content_embedding(
         detected_type: Auto-detected content type
 
     Returns:
-        Optional[List[float]]: Embedding vector or None if generation fails
+        Optional[np.ndarray]: Normalized float32 embedding vector, or None if
+        generation fails
     """
-    try:
-        vectorizer = get_vectorizer()
+    vectorizer = get_vectorizer()
 
-        # Check if LM Studio is available
-        if not await vectorizer.health_check():
-            logger.warning(
-                "LM Studio not available, skipping embedding generation"
-            )
-            return None
+    # No pre-flight probe: failed calls are the health check, and repeated
+    # ones suspend embedding for a while instead of failing on every chunk
+    if not vectorizer.is_healthy():
+        return None
 
-        return vectorizer.generate_embedding(
-            text=content,
-            content_type=content_type,
-            detected_type=detected_type,
+    try:
+        model = await vectorizer.select_model_for_content(
+            content_type, detected_type
+        )
+        embedding = await vectorizer.batcher.submit(content, model)
+        vectorizer.mark_available()
+        return embedding
+
+    except VectorizerConnectionError as e:
+        vectorizer.mark_unavailable()
+        logger.warning(
+            "LM Studio not available, skipping embedding generation: %s", e
         )
+        return None
 
     except Exception as e:
-        logger.error(f"Failed to generate content embedding: {e}")
+        logger.error("Failed to generate content embedding: %s", e)
         return None
+
+
+async def generate_content_embeddings(
+    contents: List[str], content_type: str = "text", detected_type: str = None
+) -> List[Optional[np.ndarray]]:
+    """
+    Convenience function to embed several related texts in one batch call.
+
+    Args:
+        contents: Text contents to embed
+        content_type: Content type hint
+        detected_type: Auto-detected content type
+
+    Returns:
+        List[Optional[np.ndarray]]: Normalized float32 embedding vector per
+        content, or None where generation fails
+    """
+    vectorizer = get_vectorizer()
+
+    if not vectorizer.is_healthy():
+        return [None] * len(contents)
+
+    try:
+        embeddings = await vectorizer.generate_embeddings_batch(
+            contents, content_type=content_type, detected_type=detected_type
+        )
+        vectorizer.mark_available()
+        return list(embeddings)
+
+    except VectorizerConnectionError as e:
+        vectorizer.mark_unavailable()
+        logger.warning(
+            "LM Studio not available, skipping embedding generation: %s", e
+        )
+        return [None] * len(contents)
+
+    except Exception as e:
+        # One bad text fails the whole batch; embed them one at a time so
+        # only the texts that really fail come back as None
+        logger.warning(
+            "Batch embedding failed, retrying texts individually: %s", e
+        )
+
+    async def embed_one(content: str) -> Optional[np.ndarray]:
+        try:
+            embedding = await vectorizer.generate_embedding(
+                content, content_type=content_type, detected_type=detected_type
+            )
+            vectorizer.mark_available()
+            return embedding
+        except VectorizerConnectionError:
+            vectorizer.mark_unavailable()
+            return None
+        except Exception as e:
+            logger.error("Failed to generate content embedding: %s", e)
+            return None
+
+    # Request slots in the vectorizer bound how many of these run at once
+    return list(await asyncio.gather(*map(embed_one, contents)))
@@ -6,19 +6,257 @@ content for storage in the memOS.as memory system.
 """
 
 import re
+import asyncio
+import bisect
+import json
 import logging
 import time
-from typing import List, Tuple, Optional, Dict, Any
-from datetime import datetime
+from concurrent.futures import Executor
+from typing import AsyncIterator, List, Tuple, Optional, Dict, Any
+from collections import OrderedDict
+from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
+import numpy as np
+
+try:
+    import nupunkt
+    NUPUNKT_AVAILABLE = True
+except ImportError:
+    NUPUNKT_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 from ..config import settings
-from ..services.vectorizer import generate_content_embedding
-from ..parsers.python_ast_parser import PythonASTParser
+from ..services.vectorizer import (
+    generate_content_embedding,
+    generate_content_embeddings,
+)
+from ..services.memos_client import generate_content_hash
+from ..parsers.python_ast_parser import parse_python_source
 from ..observability.langfuse_client import get_langfuse_client
 
 logger = logging.getLogger(__name__)
 
+# Patterns used on every clean and chunk split, compiled once
+_WHITESPACE_RE = re.compile(r"\s+")
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+_SENTENCE_LINE_END_RE = re.compile(r"[.!?]\s*\n")
+_SENTENCE_END_RE = re.compile(r"[.!?]\s+")
+
+# Content sniffing indicators; word indicators are matched case-insensitively
+_CODE_SYMBOL_INDICATORS = ("{", "}", "()", "=>", "#!/", "<?", "<!--")
+_CODE_WORD_INDICATORS = (
+    "def ",
+    "function ",
+    "class ",
+    "import ",
+    "from ",
+    "console.log",
+    "print(",
+    "system.out",
+)
+# "## " and "### " are omitted: any text containing them also contains
+# "# ", so scanning for them could never change the result
+_MARKDOWN_INDICATORS = ("# ", "- ", "* ", "```", "[", "](")
+
+# Indicators reported by detect_content_type, in reporting order
+_PYTHON_INDICATORS = (
+    "def ",
+    "class ",
+    "import ",
+    "from ",
+    "__init__",
+    "if __name__",
+    "print(",
+    "self.",
+    "return ",
+    "yield ",
+)
+_MARKDOWN_TYPE_PATTERNS = ("# ", "## ", "### ", "```", "*", "-")
+
+# File extension -> (content type, confidence, indicator) for detection
+_EXTENSION_TYPES = {
+    "py": ("python", 0.9, "python_extension"),
+    "md": ("markdown", 0.9, "markdown_extension"),
+    "markdown": ("markdown", 0.9, "markdown_extension"),
+    "json": ("json", 0.9, "json_extension"),
+    "txt": ("text", 0.8, "text_extension"),
+}
+
+# Control characters dropped by clean_content. \x0B, \x0C and \x1C-\x1F are
+# whitespace to the regex engine, so they are collapsed to spaces instead
+_CONTROL_CHARS_TABLE = dict.fromkeys(
+    [*range(0x00, 0x09), *range(0x0E, 0x1C), 0x7F]
+)
+
+
+# Identifies this service in the metadata of every stored chunk
+_SERVICE_METADATA = {
+    "processor_version": "1.0.0",
+    "ingested_by": "InGest-LLM.as",
+    "service_version": settings.app_version,
+}
+
+# Bytes str.split() treats as whitespace in ASCII text
+_ASCII_WHITESPACE = np.zeros(256, dtype=bool)
+_ASCII_WHITESPACE[list(b" \t\n\x0b\x0c\r\x1c\x1d\x1e\x1f")] = True
+
+
+# Below this size the vectorised word count costs more than str.split()
+_VECTORISED_MIN_CHARS = 1024
+
+
+def _count_words(content: str) -> int:
+    """Count whitespace-separated words, as ``len(content.split())`` would."""
+    if len(content) < _VECTORISED_MIN_CHARS or not content.isascii():
+        return len(content.split())
+    # Vectorised over the bytes: a word starts wherever a non-space byte
+    # follows a space (or the start), without building the word list
+    is_word = ~_ASCII_WHITESPACE[np.frombuffer(content.encode(), np.uint8)]
+    starts = np.count_nonzero(is_word[1:] & ~is_word[:-1])
+    return int(is_word[0]) + int(starts)
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def _ascii_text_stats(data: np.ndarray, whitespace: np.ndarray) -> tuple:
+        """Word and line counts of ASCII bytes in a single pass."""
+        words = 0
+        lines = 1
+        in_word = False
+        for byte in data:
+            if byte == 10:
+                lines += 1
+            if whitespace[byte]:
+                in_word = False
+            elif not in_word:
+                in_word = True
+                words += 1
+        return words, lines
+
+    # Compile at import so the first request doesn't pay for the JIT
+    _ascii_text_stats(np.zeros(1, dtype=np.uint8), _ASCII_WHITESPACE)
+
+
+def _text_stats(content: str) -> Tuple[int, int]:
+    """Return the word and line counts of ``content``."""
+    if NUMBA_AVAILABLE and content.isascii():
+        words, lines = _ascii_text_stats(
+            np.frombuffer(content.encode(), np.uint8), _ASCII_WHITESPACE
+        )
+        return int(words), int(lines)
+    return _count_words(content), content.count("\n") + 1
+
+
+def _last_match(
+    pattern: re.Pattern, text: str, start: int, end: int
+) -> Optional[re.Match]:
+    """Return the last match of ``pattern`` in ``text[start:end]``."""
+    match = None
+    for match in pattern.finditer(text, start, end):
+        pass
+    return match
+
+
+# The outermost non-space characters are found without copying the content
+# through strip(); surrounding whitespace is usually a few characters at most
+def _first_non_space(text: str) -> str:
+    """Return the first non-whitespace character of ``text``, or ""."""
+    for char in text:
+        if not char.isspace():
+            return char
+    return ""
+
+
+def _last_non_space(text: str) -> str:
+    """Return the last non-whitespace character of ``text``, or ""."""
+    for char in reversed(text):
+        if not char.isspace():
+            return char
+    return ""
+
+
+def _looks_like_code(content: str) -> bool:
+    """Check if content appears to be code."""
+    # Symbols need no case folding, so most code is recognised without
+    # lowercasing a copy of the content
+    if any(indicator in content for indicator in _CODE_SYMBOL_INDICATORS):
+        return True
+    content_lower = content.lower()
+    return any(
+        indicator in content_lower for indicator in _CODE_WORD_INDICATORS
+    )
+
+
+def _looks_like_markdown(content: str) -> bool:
+    """Check if content appears to be Markdown."""
+    return any(indicator in content for indicator in _MARKDOWN_INDICATORS)
+
+
+def _looks_like_json(content: str) -> bool:
+    """Check if content appears to be JSON."""
+    first, last = _first_non_space(content), _last_non_space(content)
+    return (first == "{" and last == "}") or (first == "[" and last == "]")
+
+
+def _parses_as_json(content: str) -> bool:
+    """Check if content is a valid JSON document."""
+    try:
+        json.loads(content)
+    except (ValueError, RecursionError):
+        return False
+    return True
+
+
+# Retries and re-ingests submit the same documents again. Detected types
+# are remembered by (length, content hash) so the documents aren't kept
+# alive, but only for content the cheap checks can't settle: hashing costs
+# a pass over the content, far more than finding a code symbol
+_DETECTED_TYPE_CACHE_SIZE = 1024
+_detected_types: "OrderedDict[Tuple[int, str], str]" = OrderedDict()
+
+
+def _detect_type(content: str) -> str:
+    """Classify content as json, code, markdown or text."""
+    # Most repository content is code and is recognised by its first
+    # symbol indicator; JSON-looking content has to be parsed first
+    looks_like_json = _looks_like_json(content)
+    if not looks_like_json and any(
+        indicator in content for indicator in _CODE_SYMBOL_INDICATORS
+    ):
+        return "code"
+
+    key = (len(content), generate_content_hash(content))
+    # Popping and re-inserting marks the entry most recently used
+    detected = _detected_types.pop(key, None)
+    if detected is None:
+        detected = _classify(content, looks_like_json)
+    _detected_types[key] = detected
+    if len(_detected_types) > _DETECTED_TYPE_CACHE_SIZE:
+        _detected_types.popitem(last=False)
+    return detected
+
+
+def _classify(content: str, looks_like_json: bool) -> str:
+    """Run the detection checks for ``_detect_type``."""
+    # JSON has to be recognised first, since braces and brackets are code
+    # and markdown indicators as well. Matching outer brackets alone would
+    # also catch bracketed markdown or a code block in braces, so only a
+    # document that actually parses is reported as JSON
+    if looks_like_json and _parses_as_json(content):
+        return "json"
+    if _looks_like_code(content):
+        return "code"
+    if _looks_like_markdown(content):
+        return "markdown"
+    return "text"
+
 
 class ContentProcessor:
     """
@@ -28,13 +266,30 @@ class ContentProcessor:
     for optimal storage in different memory tiers with embedding generation.
     """
 
-    def __init__(self, chunk_size: int = None, enable_embeddings: bool = None):
+    # A processor is created per request; slots keep instances small and
+    # attribute reads in the chunking loop off the instance dict
+    __slots__ = (
+        "chunk_size",
+        "max_chunk_size",
+        "min_chunk_size",
+        "enable_embeddings",
+        "parse_executor",
+    )
+
+    def __init__(
+        self,
+        chunk_size: int = None,
+        enable_embeddings: bool = None,
+        parse_executor: Optional[Executor] = None,
+    ):
         """
         Initialize content processor.
 
         Args:
             chunk_size: Maximum size for content chunks
             enable_embeddings: Whether to generate embeddings for content
+            parse_executor: Optional executor (e.g. a process pool) used to run
+                CPU-bound AST parsing off the event loop
         """
         self.chunk_size = chunk_size or settings.default_chunk_size
         self.max_chunk_size = 10000  # Hard limit
@@ -44,6 +299,7 @@ class ContentProcessor:
             if enable_embeddings is not None
             else settings.embedding_enabled
         )
+        self.parse_executor = parse_executor
 
     def clean_content(self, content: str) -> str:
         """
@@ -55,18 +311,18 @@ class ContentProcessor:
         Returns:
             str: Cleaned content
         """
-        # Strip whitespace
-        cleaned = content.strip()
-
-        # Normalize whitespace (multiple spaces/newlines to single)
-        cleaned = re.sub(r"\s+", " ", cleaned)
-
-        # Remove control characters except newlines and tabs
-        cleaned = re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]", "", cleaned)
-
-        return cleaned
+        # Remove control characters in one C-level pass, then strip and
+        # normalize whitespace (multiple spaces/newlines to single);
+        # split() treats exactly the characters \s matches as whitespace
+        cleaned = content.translate(_CONTROL_CHARS_TABLE)
+        return " ".join(cleaned.split())
 
-    def chunk_content(self, content: str, chunk_size: int = None) -> List[str]:
+    def chunk_content(
+        self,
+        content: str,
+        chunk_size: int = None,
+        content_type: Optional[str] = None,
+    ) -> List[str]:
         """
         Split content into optimally-sized chunks.
 
@@ -78,6 +334,8 @@ class ContentProcessor:
         Args:
             content: Content to chunk
             chunk_size: Override default chunk size
+            content_type: Content type; code is split without looking for
+                sentence boundaries
 
         Returns:
             List[str]: List of content chunks
@@ -88,15 +346,36 @@ class ContentProcessor:
         if len(content) <= target_size:
             return [content]
 
+        # Walk split offsets through the content rather than re-slicing
+        # the remaining tail (which copies it) for every chunk
         chunks = []
-        remaining = content
+        position = 0
+        min_size = self.min_chunk_size
+
+        # With nupunkt, segment sentences once for the whole document; it
+        # knows "Dr. Smith" or "e.g. this" don't end a sentence. Code has
+        # no sentences: an empty list skips that tier (and the segmenting)
+        # so it splits on line or word boundaries
+        if content_type == "code":
+            sentence_ends = []
+        elif NUPUNKT_AVAILABLE:
+            sentence_ends = [end for _, end in nupunkt.sent_spans(content)]
+        else:
+            sentence_ends = None
 
-        while remaining and len(remaining) > target_size:
+        find_split_index = self._find_split_index
+        content_length = len(content)
+        while content_length - position > target_size:
             # Find optimal split point
-            chunk, remaining = self._find_optimal_split(remaining, target_size)
+            end = find_split_index(
+                content, position, target_size, sentence_ends
+            )
+            chunk = content[position:end].strip()
+            position = end
 
-            if chunk:
-                chunks.append(chunk.strip())
+            # Drop undersized chunks here rather than filtering the list
+            if len(chunk) >= min_size:
+                chunks.append(chunk)
 
             # Safety check to prevent infinite loops
             if len(chunks) > settings.max_chunks_per_request:
@@ -106,16 +385,21 @@ class ContentProcessor:
                 break
 
         # Add final chunk if remaining content
-        if remaining and remaining.strip():
-            chunks.append(remaining.strip())
+        remaining = content[position:].strip()
+        if len(remaining) >= min_size:
+            chunks.append(remaining)
 
-        return [chunk for chunk in chunks if len(chunk) >= self.min_chunk_size]
+        return chunks
 
-    def _find_optimal_split(
-        self, content: str, target_size: int
-    ) -> Tuple[str, str]:
+    def _find_split_index(
+        self,
+        content: str,
+        start: int,
+        target_size: int,
+        sentence_ends: Optional[List[int]] = None,
+    ) -> int:
         """
-        Find optimal split point for content chunking.
+        Find optimal split point for the chunk beginning at ``start``.
 
         Tries to split at natural boundaries in order of preference:
         1. Double newline (paragraph boundary)
@@ -125,46 +409,80 @@ class ContentProcessor:
         5. Character boundary (fallback)
 
         Args:
-            content: Content to split
+            content: Content being chunked
+            start: Offset where the chunk begins
             target_size: Target chunk size
+            sentence_ends: Sorted sentence end offsets from a sentence
+                segmenter; sentence ends are found by regex if omitted
 
         Returns:
-            Tuple[str, str]: (chunk, remaining_content)
+            int: Offset in ``content`` where the chunk ends
         """
-        if len(content) <= target_size:
-            return content, ""
+        if len(content) - start <= target_size:
+            return len(content)
 
         # Define search window (look back from target size)
-        search_start = max(0, target_size - 200)
-        search_end = min(len(content), target_size + 100)
-        search_text = content[search_start:search_end]
-
-        # Try paragraph boundary first
-        paragraph_matches = list(re.finditer(r"\n\s*\n", search_text))
-        if paragraph_matches:
-            split_pos = search_start + paragraph_matches[-1].end()
-            return content[:split_pos], content[split_pos:]
-
-        # Try sentence boundary at line end
-        sentence_line_matches = list(re.finditer(r"[.!?]\s*\n", search_text))
-        if sentence_line_matches:
-            split_pos = search_start + sentence_line_matches[-1].end()
-            return content[:split_pos], content[split_pos:]
+        search_start = start + max(0, target_size - 200)
+        search_end = min(len(content), start + target_size + 100)
+
+        # Each tier starts its regex scan at the last occurrence of its
+        # most common literal form, found with rfind. The last match from
+        # there ends where a scan of the whole window would end, but
+        # usually only the last few characters go through the regex
+
+        # Both line-based boundaries need a newline; cleaned content has none
+        if content.find("\n", search_start, search_end) != -1:
+            # Try paragraph boundary first
+            hint = content.rfind("\n\n", search_start, search_end)
+            match = _last_match(
+                _PARAGRAPH_BREAK_RE,
+                content,
+                max(hint, search_start),
+                search_end,
+            )
+            if match:
+                return match.end()
+
+            # Try sentence boundary at line end
+            hint = content.rfind(".\n", search_start, search_end)
+            match = _last_match(
+                _SENTENCE_LINE_END_RE,
+                content,
+                max(hint, search_start),
+                search_end,
+            )
+            if match:
+                return match.end()
 
         # Try sentence boundary
-        sentence_matches = list(re.finditer(r"[.!?]\s+", search_text))
-        if sentence_matches:
-            split_pos = search_start + sentence_matches[-1].end()
-            return content[:split_pos], content[split_pos:]
+        if sentence_ends is not None:
+            i = bisect.bisect_right(sentence_ends, search_end) - 1
+            if i >= 0 and sentence_ends[i] > search_start:
+                return sentence_ends[i]
+        else:
+            hint = content.rfind(". ", search_start, search_end)
+            match = _last_match(
+                _SENTENCE_END_RE, content, max(hint, search_start), search_end
+            )
+            if match:
+                return match.end()
 
-        # Try word boundary
-        word_matches = list(re.finditer(r"\s+", search_text))
-        if word_matches:
-            split_pos = search_start + word_matches[-1].start()
-            return content[:split_pos], content[split_pos:]
+        # Try word boundary; a run at the very start would make no progress
+        hint = content.rfind(" ", search_start, search_end)
+        match = _last_match(
+            _WHITESPACE_RE, content, max(hint, search_start), search_end
+        )
+        if match:
+            split = match.start()
+            # The space found may sit inside a longer whitespace run
+            if split == hint:
+                while split > search_start and content[split - 1].isspace():
+                    split -= 1
+            if split > start:
+                return split
 
         # Fallback: hard split at target size
-        return content[:target_size], content[target_size:]
+        return start + target_size
 
     def extract_metadata_from_content(self, content: str) -> dict:
         """
@@ -179,70 +497,40 @@ class ContentProcessor:
         metadata = {}
 
         # Basic content statistics
-        metadata["word_count"] = len(content.split())
+        word_count, line_count = _text_stats(content)
+        metadata["word_count"] = word_count
         metadata["char_count"] = len(content)
-        metadata["line_count"] = content.count("\n") + 1
+        metadata["line_count"] = line_count
 
         # Try to detect content patterns
-        if self._looks_like_code(content):
-            metadata["detected_type"] = "code"
-        elif self._looks_like_markdown(content):
-            metadata["detected_type"] = "markdown"
-        elif self._looks_like_json(content):
-            metadata["detected_type"] = "json"
-        else:
-            metadata["detected_type"] = "text"
+        metadata["detected_type"] = _detect_type(content)
 
         # Extract potential title (first line if it looks like a title)
-        lines = content.split("\n")
-        if lines:
-            first_line = lines[0].strip()
-            if (
-                len(first_line) < 100
-                and not first_line.endswith(".")
-                and len(first_line.split()) <= 10
-            ):
-                metadata["potential_title"] = first_line
+        first_line = content.partition("\n")[0].strip()
+        if (
+            len(first_line) < 100
+            and not first_line.endswith(".")
+            and len(first_line.split()) <= 10
+        ):
+            metadata["potential_title"] = first_line
 
         return metadata
 
     def _looks_like_code(self, content: str) -> bool:
         """Check if content appears to be code."""
-        code_indicators = [
-            "def ",
-            "function ",
-            "class ",
-            "import ",
-            "from ",
-            "#!/",
-            "<?",
-            "<!--",
-            "{",
-            "}",
-            "()",
-            "=>",
-            "console.log",
-            "print(",
-            "System.out",
-        ]
-        content_lower = content.lower()
-        return any(indicator in content_lower for indicator in code_indicators)
+        return _looks_like_code(content)
 
     def _looks_like_markdown(self, content: str) -> bool:
         """Check if content appears to be Markdown."""
-        md_indicators = ["# ", "## ", "### ", "- ", "* ", "```", "[", "]("]
-        return any(indicator in content for indicator in md_indicators)
+        return _looks_like_markdown(content)
 
     def _looks_like_json(self, content: str) -> bool:
         """Check if content appears to be JSON."""
-        stripped = content.strip()
-        return (stripped.startswith("{") and stripped.endswith("}")) or (
-            stripped.startswith("[") and stripped.endswith("]")
-        )
+        return _looks_like_json(content)
 
     async def generate_embeddings_for_chunks(
         self, chunks: List[str], content_type: str, detected_type: str = None
-    ) -> List[Optional[List[float]]]:
+    ) -> List[Optional[np.ndarray]]:
         """
         Generate embeddings for content chunks using LM Studio.
 
@@ -255,7 +543,7 @@ class ContentProcessor:
             detected_type: Auto-detected content type
 
         Returns:
-            List[Optional[List[float]]]: Embeddings for each chunk (None if generation fails)
+            List[Optional[np.ndarray]]: Embeddings for each chunk (None if generation fails)
         """
         if not self.enable_embeddings or not settings.lm_studio_enabled:
             logger.debug(
@@ -263,39 +551,131 @@ class ContentProcessor:
             )
             return [None] * len(chunks)
 
-        embeddings = []
+        total = len(chunks)
 
-        for i, chunk in enumerate(chunks):
+        async def embed_chunk(i: int, chunk: str) -> Optional[np.ndarray]:
             try:
                 embedding = await generate_content_embedding(
                     content=chunk,
                     content_type=content_type,
                     detected_type=detected_type,
                 )
-                embeddings.append(embedding)
-
-                if embedding:
-                    logger.debug(
-                        f"Generated embedding for chunk {i + 1}/{len(chunks)}"
-                    )
-                else:
-                    logger.warning(
-                        f"Failed to generate embedding for chunk {i + 1}/{len(chunks)}"
-                    )
-
             except Exception as e:
                 logger.error(
-                    f"Error generating embedding for chunk {i + 1}: {e}"
+                    "Error generating embedding for chunk %d: %s", i + 1, e
                 )
-                embeddings.append(None)
+                return None
+
+            # Per-chunk logging runs once for every chunk of large ingests;
+            # leave the arguments unformatted unless the record is emitted
+            if embedding is not None:
+                logger.debug(
+                    "Generated embedding for chunk %d/%d", i + 1, total
+                )
+            else:
+                logger.warning(
+                    "Failed to generate embedding for chunk %d/%d",
+                    i + 1,
+                    total,
+                )
+            return embedding
+
+        if total > 1:
+            # One batch call for the whole group instead of a request per
+            # chunk; failed chunks come back as None
+            embeddings = await generate_content_embeddings(
+                chunks, content_type=content_type, detected_type=detected_type
+            )
+            for i, embedding in enumerate(embeddings):
+                if embedding is None:
+                    logger.warning(
+                        "Failed to generate embedding for chunk %d/%d",
+                        i + 1,
+                        total,
+                    )
+        else:
+            # A lone chunk goes through the vectorizer's batcher, which
+            # coalesces it with concurrent requests from other ingests
+            embeddings = [
+                await embed_chunk(i, chunk) for i, chunk in enumerate(chunks)
+            ]
 
         success_count = sum(1 for emb in embeddings if emb is not None)
         logger.info(
-            f"Generated {success_count}/{len(chunks)} embeddings successfully"
+            "Generated %d/%d embeddings successfully", success_count, total
         )
 
         return embeddings
 
+    async def iter_chunks_with_embeddings(
+        self, chunks: List[str], content_type: str, detected_type: str = None
+    ) -> AsyncIterator[Tuple[str, Optional[np.ndarray]]]:
+        """
+        Lazily yield chunks paired with their embeddings.
+
+        Embeddings are generated in groups of ``settings.embedding_batch_size``
+        through generate_embeddings_for_chunks. While the caller consumes
+        one group, the next one is already being embedded, so storing and
+        embedding overlap.
+
+        Args:
+            chunks: List of content chunks to embed
+            content_type: Content type for model selection
+            detected_type: Auto-detected content type
+
+        Yields:
+            Tuple[str, Optional[np.ndarray]]: (chunk, embedding or None)
+        """
+        group_size = max(1, settings.embedding_batch_size)
+        total = len(chunks)
+
+        def embed_group(start: int) -> Optional[asyncio.Task]:
+            if start >= total:
+                return None
+            return asyncio.create_task(
+                self.generate_embeddings_for_chunks(
+                    chunks=chunks[start : start + group_size],
+                    content_type=content_type,
+                    detected_type=detected_type,
+                )
+            )
+
+        pending = embed_group(0)
+        try:
+            for start in range(0, total, group_size):
+                embeddings = await pending
+                # Embed the next group while the caller handles this one
+                pending = embed_group(start + group_size)
+                group = chunks[start : start + group_size]
+                for chunk, embedding in zip(group, embeddings):
+                    yield chunk, embedding
+        finally:
+            # The caller may stop early; don't leave a prefetch running
+            if pending is not None:
+                pending.cancel()
+
+    def prepare_content(
+        self, content: str, content_type: str
+    ) -> Tuple[str, List[str], dict]:
+        """
+        Clean, chunk and analyse content ahead of embedding.
+
+        Args:
+            content: Raw content to process
+            content_type: Content type for processing
+
+        Returns:
+            Tuple[str, List[str], dict]: Cleaned content, its chunks and its
+            extracted metadata
+        """
+        # Clean and chunk content
+        cleaned_content = self.clean_content(content)
+        chunks = self.chunk_content(cleaned_content, content_type=content_type)
+
+        # Extract metadata
+        content_metadata = self.extract_metadata_from_content(cleaned_content)
+        return cleaned_content, chunks, content_metadata
+
     async def process_content_with_embeddings(
         self, content: str, content_type: str, detected_type: str = None
     ) -> Dict[str, Any]:
@@ -310,12 +690,9 @@ class ContentProcessor:
         Returns:
             Dict[str, Any]: Processing results with chunks and embeddings
         """
-        # Clean and chunk content
-        cleaned_content = self.clean_content(content)
-        chunks = self.chunk_content(cleaned_content)
-
-        # Extract metadata
-        content_metadata = self.extract_metadata_from_content(cleaned_content)
+        cleaned_content, chunks, content_metadata = self.prepare_content(
+            content, content_type
+        )
 
         # Generate embeddings
         embeddings = await self.generate_embeddings_for_chunks(
@@ -364,23 +741,25 @@ class ContentProcessor:
         # Create Langfuse trace for Python AST processing
         trace_id = None
         if langfuse_client.enabled:
+            source_length = len(source_code)
+            source_lines = source_code.count("\n") + 1
             trace_id = langfuse_client.create_trace(
                 name="python_ast_processing",
                 metadata={
                     "file_path": file_path,
                     "content_type": content_type,
-                    "source_length": len(source_code),
-                    "source_lines": len(source_code.split("\n")),
+                    "source_length": source_length,
+                    "source_lines": source_lines,
                     "embedding_enabled": self.enable_embeddings,
                 },
                 tags=["ast", "python", "code_processing", content_type],
                 input_data={
                     "file_path": file_path,
                     "content_type": content_type,
-                    "source_length": len(source_code),
-                    "source_lines": len(source_code.split("\n")),
+                    "source_length": source_length,
+                    "source_lines": source_lines,
                     "source_preview": source_code[:200] + "..."
-                    if len(source_code) > 200
+                    if source_length > 200
                     else source_code,
                 },
             )
@@ -388,8 +767,12 @@ class ContentProcessor:
         try:
             # Parse Python code using AST parser
             ast_start_time = time.time()
-            ast_parser = PythonASTParser()
-            parsing_result = ast_parser.parse_source(source_code, file_path)
+            if self.parse_executor is not None:
+                parsing_result = await asyncio.get_running_loop().run_in_executor(
+                    self.parse_executor, parse_python_source, source_code, file_path
+                )
+            else:
+                parsing_result = parse_python_source(source_code, file_path)
             ast_duration = time.time() - ast_start_time
 
             if not parsing_result.success:
@@ -442,59 +825,64 @@ class ContentProcessor:
 
             # Convert code elements to searchable content chunks
             chunking_start_time = time.time()
-            code_chunks = []
-            code_elements_metadata = []
-
-            for element in parsing_result.elements:
-                # Generate searchable content for the element
-                searchable_content = element.to_searchable_content()
-                code_chunks.append(searchable_content)
-
-                # Create metadata for this code element
-                element_metadata = {
-                    "element_type": element.element_type.value,
-                    "name": element.name,
-                    "qualified_name": element.qualified_name,
-                    "line_start": element.line_start,
-                    "line_end": element.line_end,
-                    "complexity_score": element.complexity_score,
-                    "decorators": element.decorators,
-                    "parent_class": element.parent_class,
-                    "dependencies": element.dependencies,
-                    "tags": list(element.tags),
-                    "content_hash": element.content_hash,
-                    "has_docstring": bool(element.docstring),
-                    "signature": element.signature,
-                }
-                code_elements_metadata.append(element_metadata)
-
-            chunking_duration = time.time() - chunking_start_time
-
-            # Generate embeddings for code elements
+            code_chunks = [
+                element.to_searchable_content()
+                for element in parsing_result.elements
+            ]
+
+            # Generate embeddings for code elements; the request is in flight
+            # while the element metadata is built below
             embedding_start_time = time.time()
-            embeddings = await self.generate_embeddings_for_chunks(
-                chunks=code_chunks,
-                content_type="code",  # Use "code" type for embedding model selection
-                detected_type="python",
+            embedding_task = asyncio.create_task(
+                self.generate_embeddings_for_chunks(
+                    chunks=code_chunks,
+                    content_type="code",  # Use "code" type for embedding model selection
+                    detected_type="python",
+                )
             )
+
+            try:
+                # Element statistics are gathered in the same pass
+                code_elements_metadata = []
+                function_count = class_count = 0
+                complexity_sum = 0
+                for element in parsing_result.elements:
+                    element_type = element.element_type.value
+                    if "function" in element_type:
+                        function_count += 1
+                    elif element_type == "class":
+                        class_count += 1
+                    complexity_sum += element.complexity_score
+
+                    # Create metadata for this code element
+                    element_metadata = {
+                        "element_type": element_type,
+                        "name": element.name,
+                        "qualified_name": element.qualified_name,
+                        "line_start": element.line_start,
+                        "line_end": element.line_end,
+                        "complexity_score": element.complexity_score,
+                        "decorators": element.decorators,
+                        "parent_class": element.parent_class,
+                        "dependencies": element.dependencies,
+                        "tags": list(element.tags),
+                        "content_hash": element.content_hash,
+                        "has_docstring": bool(element.docstring),
+                        "signature": element.signature,
+                    }
+                    code_elements_metadata.append(element_metadata)
+
+                chunking_duration = time.time() - chunking_start_time
+            except BaseException:
+                # Don't leave the request running unawaited
+                embedding_task.cancel()
+                raise
+
+            embeddings = await embedding_task
             embedding_duration = time.time() - embedding_start_time
 
             # Calculate processing statistics
             total_elements = len(parsing_result.elements)
-            function_count = len(
-                [
-                    e
-                    for e in parsing_result.elements
-                    if "function" in e.element_type.value
-                ]
-            )
-            class_count = len(
-                [
-                    e
-                    for e in parsing_result.elements
-                    if e.element_type.value == "class"
-                ]
-            )
             total_duration = time.time() - start_time
 
             # Record comprehensive processing results in Langfuse
@@ -566,8 +954,7 @@ class ContentProcessor:
 
                 # Track code complexity insights
                 avg_complexity = (
-                    sum(e.complexity_score for e in parsing_result.elements)
-                    / total_elements
+                    complexity_sum / total_elements
                     if total_elements > 0
                     else 0
                 )
@@ -663,30 +1050,8 @@ class ContentProcessor:
         Returns:
             str: Detected content type
         """
-        langfuse_client = get_langfuse_client()
         start_time = time.time()
 
-        # Create Langfuse trace for content type detection
-        trace_id = None
-        if langfuse_client.enabled:
-            trace_id = langfuse_client.create_trace(
-                name="content_type_detection",
-                metadata={
-                    "file_path": file_path,
-                    "content_length": len(content),
-                    "has_file_path": file_path is not None,
-                    "detection_strategy": "hybrid_file_extension_and_content",
-                },
-                tags=["content_detection", "type_classification"],
-                input_data={
-                    "file_path": file_path,
-                    "content_length": len(content),
-                    "content_preview": content[:100] + "..."
-                    if len(content) > 100
-                    else content,
-                },
-            )
-
         detected_type = "text"  # Default
         detection_method = "default"
         confidence_score = 0.3
@@ -694,47 +1059,31 @@ class ContentProcessor:
 
         # File extension based detection
         if file_path:
-            file_path_lower = file_path.lower()
-            if file_path_lower.endswith(".py"):
-                detected_type = "python"
-                detection_method = "file_extension"
-                confidence_score = 0.9
-                indicators_found.append("python_extension")
-            elif file_path_lower.endswith((".md", ".markdown")):
-                detected_type = "markdown"
-                detection_method = "file_extension"
-                confidence_score = 0.9
-                indicators_found.append("markdown_extension")
-            elif file_path_lower.endswith((".json",)):
-                detected_type = "json"
-                detection_method = "file_extension"
-                confidence_score = 0.9
-                indicators_found.append("json_extension")
-            elif file_path_lower.endswith((".txt",)):
-                detected_type = "text"
+            # Text after the last dot, so "x.py" and ".py" both map to "py";
+            # a path without a dot (e.g. "py") has no extension
+            _, dot, extension = file_path.rpartition(".")
+            extension_match = (
+                _EXTENSION_TYPES.get(extension.lower()) if dot else None
+            )
+            if extension_match is not None:
+                detected_type, confidence_score, indicator = extension_match
                 detection_method = "file_extension"
-                confidence_score = 0.8
-                indicators_found.append("text_extension")
+                indicators_found.append(indicator)
 
         # Content-based detection (if no file extension match or low confidence)
         if confidence_score < 0.8:
-            content_lower = content.lower().strip()
+            # One lowercased copy; trailing whitespace is excluded by bounding
+            # the searches rather than by stripping another copy
+            content_lower = content.lower()
+            end = len(content_lower)
+            while end and content_lower[end - 1].isspace():
+                end -= 1
 
             # Check for Python code patterns
-            python_indicators = [
-                "def ",
-                "class ",
-                "import ",
-                "from ",
-                "__init__",
-                "if __name__",
-                "print(",
-                "self.",
-                "return ",
-                "yield ",
-            ]
             python_matches = [
-                ind for ind in python_indicators if ind in content_lower
+                ind
+                for ind in _PYTHON_INDICATORS
+                if content_lower.find(ind, 0, end) != -1
             ]
             if python_matches:
                 detected_type = "python"
@@ -743,26 +1092,21 @@ class ContentProcessor:
                 indicators_found.extend(python_matches)
 
             # Check for JSON
-            elif content_lower.startswith(("{", "[")):
-                try:
-                    import json
-
-                    json.loads(content)
+            elif _first_non_space(content_lower) in ("{", "["):
+                # Only parse content whose outer brackets match; anything
+                # else would fail json.loads after a full scan anyway
+                if _looks_like_json(content) and _parses_as_json(content):
                     detected_type = "json"
                     detection_method = "content_validation"
                     confidence_score = 0.95
                     indicators_found.append("valid_json_structure")
-                except:
+                else:
                     indicators_found.append("json_like_start_but_invalid")
 
             # Check for Markdown
-            elif any(
-                pattern in content
-                for pattern in ["# ", "## ", "### ", "```", "*", "-"]
-            ):
-                markdown_patterns = ["# ", "## ", "### ", "```", "*", "-"]
+            else:
                 markdown_matches = [
-                    p for p in markdown_patterns if p in content
+                    p for p in _MARKDOWN_TYPE_PATTERNS if p in content
                 ]
                 if markdown_matches:
                     detected_type = "markdown"
@@ -772,13 +1116,29 @@ class ContentProcessor:
                     )
                     indicators_found.extend(markdown_matches)
 
-        detection_duration = time.time() - start_time
-
-        # Record detection results in Langfuse
-        if langfuse_client.enabled and trace_id:
-            langfuse_client.client.trace(
-                id=trace_id,
-                output={
+        # Detection runs for every ingested file, so its trace is opt-in.
+        # It is created once, with its output, rather than created up front
+        # and updated with the result
+        langfuse_client = get_langfuse_client()
+        if langfuse_client.enabled and settings.langfuse_trace_detection:
+            detection_duration = time.time() - start_time
+            trace_id = langfuse_client.create_trace(
+                name="content_type_detection",
+                metadata={
+                    "file_path": file_path,
+                    "content_length": len(content),
+                    "has_file_path": file_path is not None,
+                    "detection_strategy": "hybrid_file_extension_and_content",
+                },
+                tags=["content_detection", "type_classification"],
+                input_data={
+                    "file_path": file_path,
+                    "content_length": len(content),
+                    "content_preview": content[:100] + "..."
+                    if len(content) > 100
+                    else content,
+                },
+                output_data={
                     "detected_type": detected_type,
                     "detection_method": detection_method,
                     "confidence_score": confidence_score,
@@ -790,28 +1150,29 @@ class ContentProcessor:
                 },
             )
 
-            # Score detection confidence
-            langfuse_client.score_trace(
-                trace_id=trace_id,
-                name="content_type_confidence",
-                value=confidence_score,
-                comment=f"Detected {detected_type} using {detection_method} with {len(indicators_found)} indicators",
-            )
+            if trace_id:
+                # Score detection confidence
+                langfuse_client.score_trace(
+                    trace_id=trace_id,
+                    name="content_type_confidence",
+                    value=confidence_score,
+                    comment=f"Detected {detected_type} using {detection_method} with {len(indicators_found)} indicators",
+                )
 
-            # Score detection method effectiveness
-            method_score = (
-                1.0
-                if detection_method == "file_extension"
-                else 0.8
-                if detection_method == "content_validation"
-                else 0.6
-            )
-            langfuse_client.score_trace(
-                trace_id=trace_id,
-                name="detection_method_reliability",
-                value=method_score,
-                comment=f"Method: {detection_method}, Confidence: {confidence_score:.2f}",
-            )
+                # Score detection method effectiveness
+                method_score = (
+                    1.0
+                    if detection_method == "file_extension"
+                    else 0.8
+                    if detection_method == "content_validation"
+                    else 0.6
+                )
+                langfuse_client.score_trace(
+                    trace_id=trace_id,
+                    name="detection_method_reliability",
+                    value=method_score,
+                    comment=f"Method: {detection_method}, Confidence: {confidence_score:.2f}",
+                )
 
         return detected_type
 
@@ -821,6 +1182,7 @@ def create_ingestion_metadata(
     chunk_index: int = 0,
     total_chunks: int = 1,
     processing_info: dict = None,
+    ingestion_timestamp: Optional[str] = None,
 ) -> dict:
     """
     Create comprehensive metadata for memory storage.
@@ -830,6 +1192,8 @@ def create_ingestion_metadata(
         chunk_index: Index of this chunk (0-based)
         total_chunks: Total number of chunks
         processing_info: Additional processing information
+        ingestion_timestamp: ISO timestamp shared by every chunk of the
+            ingestion; the current time is used if omitted
 
     Returns:
         dict: Complete metadata for memOS.as storage
@@ -838,16 +1202,15 @@ def create_ingestion_metadata(
         # Original metadata
         **original_metadata,
         # Processing metadata
-        "ingestion_timestamp": datetime.utcnow().isoformat(),
+        "ingestion_timestamp": ingestion_timestamp
+        or datetime.now(timezone.utc).isoformat(),
         "chunk_info": {
             "index": chunk_index,
             "total": total_chunks,
             "is_chunked": total_chunks > 1,
         },
-        "processor_version": "1.0.0",
-        # Service metadata
-        "ingested_by": "InGest-LLM.as",
-        "service_version": settings.app_version,
+        # Processor and service metadata
+        **_SERVICE_METADATA,
     }
 
     # Add processing info if provided
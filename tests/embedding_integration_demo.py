@@ -94,14 +94,14 @@ def fibonacci(n):
         print(f"LM Studio health check: {'PASS' if is_healthy else 'FAIL (expected without running LM Studio)'}")
         
         # Test model selection logic
-        text_model = vectorizer.select_model_for_content("text")
-        code_model = vectorizer.select_model_for_content("code")
+        text_model = await vectorizer.select_model_for_content("text")
+        code_model = await vectorizer.select_model_for_content("code")
         
         print(f"Selected model for text: {text_model}")
         print(f"Selected model for code: {code_model}")
         
         # Test embedding info
-        info = vectorizer.get_embedding_info()
+        info = await vectorizer.get_embedding_info()
         print(f"Vectorizer info: {info}")
         
     except Exception as e:
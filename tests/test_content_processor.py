@@ -0,0 +1,234 @@
+"""
+Tests for content chunking and text statistics.
+
+``chunk_content`` walks split offsets through the content instead of
+re-slicing the remaining tail; these tests pin its boundaries to the
+original slicing implementation, kept here as a reference.
+"""
+
+import random
+import re
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from ingest_llm_as.utils import content_processor as cp  # noqa: E402
+from ingest_llm_as.utils.content_processor import (  # noqa: E402
+    ContentProcessor,
+)
+
+
+def reference_split(content: str, target_size: int) -> Tuple[str, str]:
+    """The original ``_find_optimal_split``."""
+    if len(content) <= target_size:
+        return content, ""
+
+    search_start = max(0, target_size - 200)
+    search_end = min(len(content), target_size + 100)
+    search_text = content[search_start:search_end]
+
+    for pattern in (r"\n\s*\n", r"[.!?]\s*\n", r"[.!?]\s+"):
+        matches = list(re.finditer(pattern, search_text))
+        if matches:
+            split_pos = search_start + matches[-1].end()
+            return content[:split_pos], content[split_pos:]
+
+    word_matches = list(re.finditer(r"\s+", search_text))
+    if word_matches:
+        split_pos = search_start + word_matches[-1].start()
+        return content[:split_pos], content[split_pos:]
+
+    return content[:target_size], content[target_size:]
+
+
+def reference_chunks(
+    content: str, target_size: int, min_chunk_size: int = 100
+) -> List[str]:
+    """The original ``chunk_content`` loop over the remaining tail."""
+    if len(content) <= target_size:
+        return [content]
+
+    chunks = []
+    remaining = content
+    while remaining and len(remaining) > target_size:
+        chunk, remaining = reference_split(remaining, target_size)
+        if chunk:
+            chunks.append(chunk.strip())
+
+    if remaining and remaining.strip():
+        chunks.append(remaining.strip())
+
+    return [chunk for chunk in chunks if len(chunk) >= min_chunk_size]
+
+
+def _prose(seed: int, words: int) -> str:
+    """Deterministic text mixing words, sentences, lines and paragraphs."""
+    rng = random.Random(seed)
+    vocabulary = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta"]
+    breaks = [" "] * 12 + [". ", "! ", "? ", ".\n", "\n", "\n\n", "\n  \n"]
+    return "".join(
+        rng.choice(vocabulary) + rng.choice(breaks) for _ in range(words)
+    )
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    """A processor using the regex sentence tier, as the baseline did."""
+    monkeypatch.setattr(cp, "NUPUNKT_AVAILABLE", False)
+    return ContentProcessor(chunk_size=1000, enable_embeddings=False)
+
+
+class TestChunkContent:
+    """Chunk boundaries match the original slicing implementation."""
+
+    def test_content_shorter_than_chunk_size_is_one_chunk(self, processor):
+        content = "short text"
+
+        assert processor.chunk_content(content) == [content]
+        assert processor.chunk_content("x" * 1000) == ["x" * 1000]
+
+    def test_content_without_break_characters_is_hard_split(
+        self, processor
+    ):
+        content = "".join(chr(ord("a") + i % 26) for i in range(2550))
+
+        chunks = processor.chunk_content(content)
+
+        assert chunks == reference_chunks(content, 1000)
+        assert chunks == [content[:1000], content[1000:2000], content[2000:]]
+
+    @pytest.mark.parametrize("target_size", [50, 100, 150, 200, 250])
+    def test_chunk_size_within_search_window(self, processor, target_size):
+        # At or below the 200 character look-back the window starts at the
+        # chunk itself, so splits can fall before ``min_chunk_size``
+        for seed in range(20):
+            content = _prose(seed, 300)
+
+            assert processor.chunk_content(
+                content, chunk_size=target_size
+            ) == reference_chunks(content, target_size), seed
+
+    def test_trailing_remainder_is_kept(self, processor):
+        content = "a" * 1000 + "b" * 150
+
+        chunks = processor.chunk_content(content)
+
+        assert chunks == reference_chunks(content, 1000)
+        assert chunks[-1] == "b" * 150
+
+    def test_short_trailing_remainder_is_dropped(self, processor):
+        content = "a" * 1000 + "b" * 99
+
+        chunks = processor.chunk_content(content)
+
+        assert chunks == reference_chunks(content, 1000)
+        assert chunks == ["a" * 1000]
+
+    @pytest.mark.parametrize("target_size", [300, 500, 1000, 2000])
+    def test_boundaries_match_baseline(self, processor, target_size):
+        for seed in range(50):
+            content = _prose(seed, 800)
+
+            assert processor.chunk_content(
+                content, chunk_size=target_size
+            ) == reference_chunks(content, target_size), seed
+
+
+TEXT_STATS_CASES = [
+    "",
+    "one",
+    "  leading and trailing  ",
+    "tabs\tand\nnewlines\r\nmixed\x0bvertical\x0cfeed",
+    "\n\n\n",
+    "def f():\n    return 1\n",
+    "non-ascii caf\u00e9 na\u00efve \u2014 text\u00a0nbsp",
+]
+
+
+class TestTextStats:
+    """Word and line counts agree with and without the numba kernel."""
+
+    @pytest.mark.parametrize("content", TEXT_STATS_CASES)
+    def test_fallback_matches_str_split(self, monkeypatch, content):
+        monkeypatch.setattr(cp, "NUMBA_AVAILABLE", False)
+
+        assert cp._text_stats(content) == (
+            len(content.split()),
+            content.count("\n") + 1,
+        )
+
+    @pytest.mark.skipif(
+        not cp.NUMBA_AVAILABLE, reason="numba not installed"
+    )
+    @pytest.mark.parametrize("content", TEXT_STATS_CASES + [_prose(1, 500)])
+    def test_kernel_matches_fallback(self, monkeypatch, content):
+        with_kernel = cp._text_stats(content)
+        monkeypatch.setattr(cp, "NUMBA_AVAILABLE", False)
+
+        assert with_kernel == cp._text_stats(content)
+
+
+class TestDetectType:
+    """Content type detection and its memo."""
+
+    @pytest.mark.parametrize(
+        "content, expected",
+        [
+            ('{"key": [1, 2]}', "json"),
+            ("{ not json }", "code"),
+            ("def handler(event):\n    return event\n", "code"),
+            ("import os\nprint(os.name)", "code"),
+            ("# Title\n\n- item\n- item", "markdown"),
+            ("[a link](https://example.com)", "markdown"),
+            ("Plain prose without any markers.", "text"),
+        ],
+    )
+    def test_detected_type(self, content, expected):
+        assert cp._detect_type(content) == expected
+
+    def test_code_symbols_skip_the_memo(self, monkeypatch):
+        monkeypatch.setattr(cp, "_detected_types", cp.OrderedDict())
+
+        assert cp._detect_type("x = f() if a else {}") == "code"
+        assert len(cp._detected_types) == 0
+
+    def test_unsettled_content_is_remembered(self, monkeypatch):
+        monkeypatch.setattr(cp, "_detected_types", cp.OrderedDict())
+        calls = []
+        classify = cp._classify
+        monkeypatch.setattr(
+            cp,
+            "_classify",
+            lambda *args: calls.append(args) or classify(*args),
+        )
+        prose = _prose(2, 200)
+
+        assert cp._detect_type(prose) == cp._detect_type(prose)
+        assert len(calls) == 1
+        assert len(cp._detected_types) == 1
+
+
+class TestDetectContentType:
+    """Extension based detection matches the file name's last suffix."""
+
+    @pytest.mark.parametrize(
+        "file_path, expected",
+        [
+            ("pkg/module.py", "python"),
+            ("README.MD", "markdown"),
+            ("data.json", "json"),
+            (".py", "python"),
+            ("py", "text"),
+            ("md", "text"),
+            ("json", "text"),
+            ("pkg.py/notes", "text"),
+        ],
+    )
+    def test_extension(self, processor, file_path, expected):
+        prose = "Plain prose without any markers."
+
+        assert processor.detect_content_type(prose, file_path) == expected
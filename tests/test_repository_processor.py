@@ -0,0 +1,149 @@
+"""
+Tests for repository path filtering and cloning.
+
+The include/exclude predicate is generated source, so it is checked against
+the straightforward fnmatch loop it replaces over a table of patterns.
+"""
+
+import asyncio
+import fnmatch
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from ingest_llm_as.models import RepositoryIngestionRequest  # noqa: E402
+from ingest_llm_as.services import repository_processor  # noqa: E402
+from ingest_llm_as.services.repository_processor import (  # noqa: E402
+    CloneCancelled,
+    _clone_with_pygit2_async,
+    _compile_path_predicate,
+)
+
+
+DEFAULT_FIELDS = RepositoryIngestionRequest.model_fields
+
+PATHS = [
+    "main.py",
+    "pkg/module.py",
+    "pkg/__pycache__/module.cpython-311.pyc",
+    "pkg/module.pyc",
+    ".git/hooks/pre-commit.py",
+    "venv/lib/site.py",
+    "src/venv_tools/run.py",
+    "node_modules/pkg/index.js",
+    "build/lib/pkg/setup.py",
+    "docs/README.md",
+    "docs/guide.rst",
+    "notes.txt",
+    "it's.py",
+    "dir/it's/file.py",
+    'say "hi".py',
+    "back\\slash.py",
+    "dir/back\\slash/x.py",
+    "test_a.py",
+    "test_ab.py",
+    "tests/test_b.py",
+    "data/file1.csv",
+    "data/fileA.csv",
+    "Makefile",
+    "a*b.py",
+    "",
+]
+
+PATTERN_SETS = [
+    pytest.param(
+        DEFAULT_FIELDS["include_patterns"].default,
+        DEFAULT_FIELDS["exclude_patterns"].default,
+        id="defaults",
+    ),
+    pytest.param(["*.py", "*.md"], [], id="suffixes"),
+    pytest.param(["**/*"], ["*.txt"], id="deep-wildcard"),
+    pytest.param(["*"], ["**/*"], id="exclude-everything-nested"),
+    pytest.param(["*.py"], ["*'*"], id="single-quote-substring"),
+    pytest.param(["*.py"], ["**/it's/**"], id="single-quote-directory"),
+    pytest.param(['*"hi"*'], [], id="double-quote"),
+    pytest.param(["*\\slash.py"], [], id="backslash-suffix"),
+    pytest.param(["*.py"], ["**/back\\slash/**"], id="backslash-directory"),
+    pytest.param(["back\\slash.py", "Makefile"], [], id="literals"),
+    pytest.param(["test_?.py", "tests/*"], [], id="question-mark"),
+    pytest.param(["data/file[0-9].csv"], [], id="character-class"),
+    pytest.param(["data/file[!0-9].csv"], [], id="negated-class"),
+    pytest.param(["a[*]b.py"], [], id="escaped-star"),
+    pytest.param(["**/*.py"], ["pkg/*", "*.pyc"], id="exclude-order"),
+    pytest.param([], ["*.txt"], id="no-includes"),
+]
+
+
+def fnmatch_reference(
+    path: str, include_patterns: List[str], exclude_patterns: List[str]
+) -> Optional[str]:
+    """The original per-pattern loop: excludes first, then includes."""
+    for pattern in exclude_patterns:
+        if fnmatch.fnmatch(path, pattern):
+            return f"Excluded by pattern: {pattern}"
+
+    for pattern in include_patterns:
+        if fnmatch.fnmatch(path, pattern):
+            return None
+
+    return f"Not matched by include patterns: {include_patterns}"
+
+
+@pytest.mark.parametrize("include_patterns, exclude_patterns", PATTERN_SETS)
+def test_compiled_predicate_matches_fnmatch(
+    include_patterns, exclude_patterns
+):
+    check = _compile_path_predicate(
+        tuple(include_patterns), tuple(exclude_patterns)
+    )
+
+    for path in PATHS:
+        path = os.path.normcase(path)
+        expected = fnmatch_reference(path, include_patterns, exclude_patterns)
+        assert check(path) == expected, path
+
+
+def test_predicate_is_cached_per_pattern_set():
+    first = _compile_path_predicate(("*.py",), ("*.pyc",))
+    second = _compile_path_predicate(("*.py",), ("*.pyc",))
+
+    assert first is second
+
+
+@pytest.mark.asyncio
+async def test_timed_out_clone_stops_before_returning(tmp_path, monkeypatch):
+    finished = []
+
+    def slow_clone(url, target_dir, cancelled):
+        # Stands in for libgit2 checking the flag from its callbacks
+        while not cancelled.is_set():
+            (target_dir / "pack").write_bytes(b"x")
+            time.sleep(0.01)
+        finished.append(True)
+        raise CloneCancelled()
+
+    monkeypatch.setattr(repository_processor, "CLONE_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(repository_processor, "_clone_with_pygit2", slow_clone)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await _clone_with_pygit2_async("https://example.com/r.git", tmp_path)
+
+    # The executor thread is done, so removing the directory is safe
+    assert finished == [True]
+
+
+def test_parse_pool_does_not_fork(monkeypatch):
+    monkeypatch.setattr(repository_processor, "_parse_pool", None)
+
+    pool = repository_processor.get_parse_pool()
+    try:
+        # Forking the multi-threaded server can deadlock the workers
+        assert pool._mp_context.get_start_method() != "fork"
+    finally:
+        repository_processor.close_parse_pool()
@@ -0,0 +1,614 @@
+"""
+Unit tests for the embedding cache, batcher, request bucketing and the
+cosine similarity kernel.
+
+These run without LM Studio: the vectorizer's OpenAI client is replaced by
+a fake that embeds each text as a small vector derived from its length.
+"""
+
+import asyncio
+import random
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from ingest_llm_as.config import settings  # noqa: E402
+from ingest_llm_as.services import vectorizer as vec_module  # noqa: E402
+from ingest_llm_as.services.vectorizer import (  # noqa: E402
+    DATASKETCH_AVAILABLE,
+    NUMBA_AVAILABLE,
+    EmbeddingBatcher,
+    EmbeddingCache,
+    LMStudioVectorizer,
+    VectorizerAPIError,
+    VectorizerConnectionError,
+    _cosine_unit_interval,
+    _cosine_unit_interval_numpy,
+    embedding_cache_key,
+)
+
+
+def _unit(values) -> np.ndarray:
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class StatusError(Exception):
+    """An HTTP error response, like ``openai.APIStatusError``."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+
+
+class FakeEmbeddings:
+    """Stands in for ``client.embeddings`` and records every request."""
+
+    def __init__(self):
+        self.requests = []
+        self.mangle = None
+
+    async def create(self, input, model, **kwargs):
+        self.requests.append((model, list(input)))
+        data = [
+            SimpleNamespace(embedding=[float(len(text)), 1.0], index=i)
+            for i, text in enumerate(input)
+        ]
+        if self.mangle is not None:
+            data = self.mangle(data)
+        return SimpleNamespace(data=data)
+
+
+@pytest.fixture
+def vectorizer(monkeypatch):
+    """A vectorizer without persistence whose client is a fake."""
+    monkeypatch.setattr(settings, "embedding_cache_path", None)
+    monkeypatch.setattr(settings, "fuzzy_cache_enabled", False)
+    instance = LMStudioVectorizer()
+    instance.client = SimpleNamespace(embeddings=FakeEmbeddings())
+    return instance
+
+
+class TestEmbeddingCacheKey:
+    """The cache key is a digest of the model and the text."""
+
+    def test_same_model_and_text_give_same_key(self):
+        assert embedding_cache_key("m", "text") == embedding_cache_key(
+            "m", "text"
+        )
+
+    def test_model_is_part_of_the_key(self):
+        assert embedding_cache_key("code", "x") != embedding_cache_key(
+            "text", "x"
+        )
+
+    def test_text_is_part_of_the_key(self):
+        assert embedding_cache_key("m", "a") != embedding_cache_key("m", "b")
+
+    def test_model_and_text_are_separated(self):
+        assert embedding_cache_key("ab", "c") != embedding_cache_key(
+            "a", "bc"
+        )
+
+
+class TestEmbeddingCache:
+    """In-memory LRU, SQLite persistence and vector packing."""
+
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self):
+        cache = EmbeddingCache(capacity=4)
+        key = embedding_cache_key("m", "hello")
+        vector = _unit([1, 2, 3])
+
+        assert await cache.get(key) is None
+        await cache.put(key, vector)
+        np.testing.assert_array_equal(await cache.get(key), vector)
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_entry_is_evicted(self):
+        cache = EmbeddingCache(capacity=2)
+        a, b, c = (embedding_cache_key("m", text) for text in "abc")
+        await cache.put(a, _unit([1, 0]))
+        await cache.put(b, _unit([0, 1]))
+        await cache.get(a)  # a is now more recent than b
+        await cache.put(c, _unit([1, 1]))
+
+        assert len(cache) == 2
+        assert await cache.get(b) is None
+        assert await cache.get(a) is not None
+        assert await cache.get(c) is not None
+
+    def test_rejects_unknown_encoding(self):
+        with pytest.raises(ValueError):
+            EmbeddingCache(capacity=1, encoding="float64")
+        with pytest.raises(ValueError):
+            EmbeddingCache(capacity=1, memory_encoding="bfloat16")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("encoding", ["float32", "float16", "int8"])
+    async def test_persisted_vectors_survive_a_new_cache(
+        self, tmp_path, encoding
+    ):
+        db_path = str(tmp_path / "embeddings.db")
+        key = embedding_cache_key("m", "persisted")
+        vector = _unit(np.linspace(-1, 1, 64))
+
+        writer = EmbeddingCache(
+            capacity=4, db_path=db_path, encoding=encoding
+        )
+        await writer.put(key, vector)
+        restored = await EmbeddingCache(capacity=4, db_path=db_path).get(key)
+
+        assert restored is not None
+        assert restored.dtype == np.float32
+        assert not restored.flags.writeable
+        assert float(restored @ vector) > 0.999
+
+    def test_database_uses_wal_journal(self, tmp_path):
+        db_path = str(tmp_path / "embeddings.db")
+        cache = EmbeddingCache(capacity=1, db_path=db_path)
+
+        with sqlite3.connect(db_path) as db:
+            (mode,) = db.execute("PRAGMA journal_mode").fetchone()
+        assert mode == "wal"
+        # NORMAL: commits don't sync to disk outside checkpoints
+        assert cache._db.execute("PRAGMA synchronous").fetchone() == (1,)
+
+    @pytest.mark.asyncio
+    async def test_database_is_used_off_the_event_loop(
+        self, tmp_path, monkeypatch
+    ):
+        cache = EmbeddingCache(
+            capacity=1, db_path=str(tmp_path / "embeddings.db")
+        )
+        threads = []
+        for name in ("_load", "_store"):
+            method = getattr(cache, name)
+
+            def record(items, method=method):
+                threads.append(threading.current_thread())
+                return method(items)
+
+            monkeypatch.setattr(cache, name, record)
+        keys = [embedding_cache_key("m", text) for text in "ab"]
+
+        await cache.put(keys[0], _unit([1, 0]))
+        await cache.put(keys[1], _unit([0, 1]))  # evicts keys[0]
+        assert await cache.get(keys[0]) is not None
+
+        assert len(threads) == 3
+        assert threading.main_thread() not in threads
+
+    @pytest.mark.asyncio
+    async def test_batch_lookup_reads_the_database_once(
+        self, tmp_path, monkeypatch
+    ):
+        db_path = str(tmp_path / "embeddings.db")
+        keys = [embedding_cache_key("m", str(i)) for i in range(1200)]
+        writer = EmbeddingCache(capacity=2000, db_path=db_path)
+        await writer.put_many([(key, _unit([1, 2])) for key in keys[::2]])
+
+        reader = EmbeddingCache(capacity=2000, db_path=db_path)
+        loads = []
+        load = reader._load
+        monkeypatch.setattr(
+            reader, "_load", lambda keys: loads.append(keys) or load(keys)
+        )
+        vectors = await reader.get_many(keys)
+
+        assert len(loads) == 1
+        assert [vector is not None for vector in vectors] == [
+            i % 2 == 0 for i in range(len(keys))
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("encoding", ["float16", "int8"])
+    async def test_quantized_memory_entries_round_trip(self, encoding):
+        cache = EmbeddingCache(capacity=4, memory_encoding=encoding)
+        key = embedding_cache_key("m", "quantized")
+        vector = _unit(np.linspace(-1, 1, 64))
+        await cache.put(key, vector)
+
+        restored = await cache.get(key)
+        assert restored.dtype == np.float32
+        assert not restored.flags.writeable
+        assert float(restored @ vector) > 0.999
+
+    @pytest.mark.asyncio
+    async def test_int8_zero_vector_round_trips(self):
+        cache = EmbeddingCache(capacity=1, memory_encoding="int8")
+        key = embedding_cache_key("m", "zero")
+        await cache.put(key, np.zeros(8, dtype=np.float32))
+
+        np.testing.assert_array_equal(await cache.get(key), np.zeros(8))
+
+
+def _near_duplicate(seed: int, edits: int) -> tuple:
+    """A random 2000 character text and a copy with ``edits`` changes."""
+    rng = random.Random(seed)
+    text = "".join(rng.choice("abcdefghij ") for _ in range(2000))
+    edited = list(text)
+    for i in rng.sample(range(len(text)), edits):
+        edited[i] = "Z"
+    return text, "".join(edited)
+
+
+@pytest.mark.skipif(not DATASKETCH_AVAILABLE, reason="needs datasketch")
+class TestFuzzyCache:
+    """Near-duplicate lookups through MinHash LSH."""
+
+    def test_minhash_matches_per_shingle_updates(self):
+        cache = EmbeddingCache(capacity=1, fuzzy=True)
+        text = "def handler(event):\n    return event"
+        size = EmbeddingCache.SHINGLE_SIZE
+        expected = vec_module.MinHash(
+            num_perm=EmbeddingCache.MINHASH_PERMUTATIONS
+        )
+        for i in range(len(text) - size + 1):
+            expected.update(text[i : i + size].encode("utf-8"))
+
+        assert cache.minhash(text) == expected
+
+    @pytest.mark.asyncio
+    async def test_lower_threshold_finds_more_distant_duplicates(self):
+        text, edited = _near_duplicate(0, 10)
+        cache = EmbeddingCache(capacity=4, fuzzy=True, fuzzy_threshold=0.9)
+        key = embedding_cache_key("m", text)
+        await cache.put(key, _unit([1, 0]))
+        cache.index_similar(key, "m", cache.minhash(text))
+
+        similarity = cache.minhash(text).jaccard(cache.minhash(edited))
+        assert 0.9 <= similarity < 0.95
+        np.testing.assert_array_equal(
+            cache.get_similar("m", cache.minhash(edited)), _unit([1, 0])
+        )
+        assert cache.get_similar("other", cache.minhash(edited)) is None
+
+    @pytest.mark.asyncio
+    async def test_near_duplicate_reuses_embedding(
+        self, vectorizer, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "fuzzy_cache_enabled", True)
+        monkeypatch.setattr(settings, "fuzzy_cache_threshold", 0.9)
+        instance = LMStudioVectorizer()
+        instance.client = vectorizer.client
+        text, edited = _near_duplicate(0, 10)
+
+        first = await instance.generate_embeddings_batch([text], model="m")
+        second = await instance.generate_embeddings_batch(
+            [edited], model="m"
+        )
+
+        assert len(instance.client.embeddings.requests) == 1
+        np.testing.assert_array_equal(first[0], second[0])
+
+
+class TestVectorizerCaching:
+    """Batch embedding only sends cache misses to LM Studio."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_texts_are_served_from_cache(self, vectorizer):
+        first = await vectorizer.generate_embeddings_batch(
+            ["alpha", "beta"], model="m"
+        )
+        second = await vectorizer.generate_embeddings_batch(
+            ["beta", "gamma", "alpha"], model="m"
+        )
+
+        requests = vectorizer.client.embeddings.requests
+        assert [sorted(texts) for _, texts in requests] == [
+            ["alpha", "beta"],
+            ["gamma"],
+        ]
+        np.testing.assert_array_equal(second[0], first[1])
+        np.testing.assert_array_equal(second[2], first[0])
+
+    @pytest.mark.asyncio
+    async def test_cache_is_per_model(self, vectorizer):
+        await vectorizer.generate_embeddings_batch(["same"], model="code")
+        await vectorizer.generate_embeddings_batch(["same"], model="text")
+
+        requests = vectorizer.client.embeddings.requests
+        assert [model for model, _ in requests] == ["code", "text"]
+
+    @pytest.mark.asyncio
+    async def test_duplicates_in_one_batch_are_embedded_once(
+        self, vectorizer
+    ):
+        embeddings = await vectorizer.generate_embeddings_batch(
+            ["dup", "other", "dup"], model="m"
+        )
+
+        requests = vectorizer.client.embeddings.requests
+        assert sorted(requests[0][1]) == ["dup", "other"]
+        np.testing.assert_array_equal(embeddings[0], embeddings[2])
+
+
+class FakeLangfuse:
+    """Records trace creation and updates like ``LangfuseClient``."""
+
+    enabled = True
+
+    def __init__(self):
+        self.updates = []
+        self.client = SimpleNamespace(
+            trace=lambda **kwargs: self.updates.append(kwargs)
+        )
+
+    def create_trace(self, **kwargs):
+        return "trace-1"
+
+    def score_trace(self, **kwargs):
+        pass
+
+
+class TestBlankInput:
+    """Blank texts get zero vectors without a request."""
+
+    @pytest.mark.asyncio
+    async def test_blank_embedding_completes_its_trace(
+        self, vectorizer, monkeypatch
+    ):
+        langfuse = FakeLangfuse()
+        monkeypatch.setattr(
+            vec_module, "get_langfuse_client", lambda: langfuse
+        )
+
+        embedding = await vectorizer.generate_embedding("  \n", model="m")
+
+        assert not embedding.any()
+        assert vectorizer.client.embeddings.requests == []
+        assert langfuse.updates == [
+            {
+                "id": "trace-1",
+                "output": {
+                    "embedding_dimensions": len(embedding),
+                    "model_used": "m",
+                    "blank_input": True,
+                    "success": True,
+                },
+            }
+        ]
+
+
+class TestRequestBucketing:
+    """Texts are split into length buckets and mapped back in order."""
+
+    @pytest.mark.asyncio
+    async def test_results_keep_input_order(self, vectorizer, monkeypatch):
+        monkeypatch.setattr(settings, "embedding_request_max_size", 2)
+        texts = ["a" * n for n in (400, 3, 2000, 1, 40, 7)]
+
+        matrix, _ = await vectorizer._embed_texts(texts, "m")
+
+        # Each fake vector is (len, 1); its ratio recovers the length
+        lengths = matrix[:, 0] / matrix[:, 1]
+        np.testing.assert_allclose(lengths, [len(text) for text in texts])
+        assert len(vectorizer.client.embeddings.requests) > 1
+
+    @pytest.mark.asyncio
+    async def test_buckets_respect_request_size(
+        self, vectorizer, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "embedding_request_max_size", 3)
+
+        await vectorizer._embed_texts(["x" * 10] * 7, "m")
+
+        requests = vectorizer.client.embeddings.requests
+        sizes = [len(texts) for _, texts in requests]
+        assert sorted(sizes) == [1, 3, 3]
+
+    @pytest.mark.asyncio
+    async def test_reordered_response_is_placed_by_index(self, vectorizer):
+        vectorizer.client.embeddings.mangle = lambda data: data[::-1]
+        texts = ["a", "bbb", "cc"]
+
+        matrix, _ = await vectorizer._embed_texts(texts, "m")
+
+        lengths = matrix[:, 0] / matrix[:, 1]
+        np.testing.assert_allclose(lengths, [1, 3, 2])
+
+    @pytest.mark.asyncio
+    async def test_short_response_is_rejected(self, vectorizer):
+        vectorizer.client.embeddings.mangle = lambda data: data[:-1]
+
+        with pytest.raises(VectorizerAPIError):
+            await vectorizer._embed_texts(["a", "bb"], "m")
+
+    @pytest.mark.asyncio
+    async def test_response_with_repeated_index_is_rejected(
+        self, vectorizer
+    ):
+        vectorizer.client.embeddings.mangle = lambda data: [data[0]] * len(
+            data
+        )
+
+        with pytest.raises(VectorizerAPIError):
+            await vectorizer._embed_texts(["a", "bb"], "m")
+
+
+class TestEmbeddingBatcher:
+    """Concurrent submissions are coalesced into batch calls."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_submissions_share_a_call(self):
+        calls = []
+
+        async def embed_batch(texts, model):
+            calls.append((model, list(texts)))
+            return np.array([[len(t), 1.0] for t in texts], np.float32)
+
+        batcher = EmbeddingBatcher(embed_batch, max_wait_ms=20)
+        results = await asyncio.gather(
+            batcher.submit("a", "code"),
+            batcher.submit("bb", "text"),
+            batcher.submit("ccc", "code"),
+        )
+
+        assert [float(vector[0]) for vector in results] == [1.0, 2.0, 3.0]
+        assert sorted(calls) == [("code", ["a", "ccc"]), ("text", ["bb"])]
+
+    @pytest.mark.asyncio
+    async def test_failing_text_only_fails_its_caller(self):
+        async def embed_batch(texts, model):
+            if "bad" in texts:
+                raise VectorizerAPIError("input exceeds the context length")
+            return np.array([[len(t), 1.0] for t in texts], np.float32)
+
+        batcher = EmbeddingBatcher(embed_batch, max_wait_ms=20)
+        results = await asyncio.gather(
+            *(batcher.submit(text, "m") for text in ["a", "bad", "ccc"]),
+            return_exceptions=True,
+        )
+
+        assert float(results[0][0]) == 1.0
+        assert isinstance(results[1], VectorizerAPIError)
+        assert float(results[2][0]) == 3.0
+
+    @pytest.mark.asyncio
+    async def test_rejected_status_is_bisected(self):
+        calls = []
+
+        async def embed_batch(texts, model):
+            calls.append(list(texts))
+            if "bad" in texts:
+                raise VectorizerAPIError("rejected") from StatusError(413)
+            return np.array([[len(t), 1.0] for t in texts], np.float32)
+
+        batcher = EmbeddingBatcher(embed_batch, max_wait_ms=20)
+        results = await asyncio.gather(
+            *(batcher.submit(text, "m") for text in ["a", "b", "bad", "c"]),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[2], VectorizerAPIError)
+        assert [float(results[i][0]) for i in (0, 1, 3)] == [1.0, 1.0, 1.0]
+        assert len(calls) > 1
+
+    @pytest.mark.asyncio
+    async def test_permanent_failure_is_not_bisected(self):
+        calls = []
+
+        async def embed_batch(texts, model):
+            calls.append(list(texts))
+            raise VectorizerAPIError("model not loaded")
+
+        batcher = EmbeddingBatcher(embed_batch, max_wait_ms=20)
+        results = await asyncio.gather(
+            *(batcher.submit(str(i), "m") for i in range(64)),
+            return_exceptions=True,
+        )
+
+        assert len(calls) == 1
+        assert all(
+            isinstance(result, VectorizerAPIError) for result in results
+        )
+
+    @pytest.mark.asyncio
+    async def test_next_batch_is_dispatched_while_one_is_in_flight(self):
+        release = asyncio.Event()
+        calls = []
+
+        async def embed_batch(texts, model):
+            calls.append(list(texts))
+            if texts == ["first"]:
+                await release.wait()
+            return np.array([[len(t), 1.0] for t in texts], np.float32)
+
+        batcher = EmbeddingBatcher(embed_batch, max_wait_ms=5)
+        first = asyncio.ensure_future(batcher.submit("first", "m"))
+        await asyncio.sleep(0.02)
+
+        # The first batch is still waiting on LM Studio
+        second = await asyncio.wait_for(batcher.submit("second", "m"), 1)
+        assert float(second[0]) == 6.0
+        assert not first.done()
+
+        release.set()
+        assert float((await first)[0]) == 5.0
+        assert calls == [["first"], ["second"]]
+
+    @pytest.mark.asyncio
+    async def test_connection_error_fails_the_whole_batch(self):
+        calls = []
+
+        async def embed_batch(texts, model):
+            calls.append(list(texts))
+            raise VectorizerConnectionError("unreachable")
+
+        batcher = EmbeddingBatcher(embed_batch, max_wait_ms=20)
+        results = await asyncio.gather(
+            *(batcher.submit(text, "m") for text in ["a", "b", "c"]),
+            return_exceptions=True,
+        )
+
+        assert len(calls) == 1
+        assert all(
+            isinstance(result, VectorizerConnectionError)
+            for result in results
+        )
+
+
+SIMILARITY_CASES = [
+    pytest.param([1.0, 0.0], [1.0, 0.0], id="identical"),
+    pytest.param([1.0, 0.0], [-1.0, 0.0], id="opposite"),
+    pytest.param([1.0, 0.0], [0.0, 1.0], id="orthogonal"),
+    pytest.param([0.0, 0.0], [1.0, 2.0], id="zero-vector"),
+    pytest.param([3.0, 4.0, 0.0], [6.0, 8.0, 0.0], id="scaled"),
+]
+
+
+class TestCosineSimilarity:
+    """The numba kernel and its numpy fallback agree."""
+
+    @pytest.mark.parametrize("a, b", SIMILARITY_CASES)
+    def test_fallback_matches_definition(self, a, b):
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+        norms = np.linalg.norm(a) * np.linalg.norm(b)
+        expected = (float(a @ b) / norms + 1) / 2 if norms else 0.0
+
+        assert _cosine_unit_interval_numpy(a, b) == pytest.approx(expected)
+
+    @pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba not installed")
+    @pytest.mark.parametrize("a, b", SIMILARITY_CASES)
+    def test_kernel_matches_fallback(self, a, b):
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+
+        assert _cosine_unit_interval(a, b) == pytest.approx(
+            _cosine_unit_interval_numpy(a, b), abs=1e-6
+        )
+
+    @pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba not installed")
+    def test_kernel_matches_fallback_on_embeddings(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            a, b = rng.standard_normal((2, 768)).astype(np.float32)
+
+            assert _cosine_unit_interval(a, b) == pytest.approx(
+                _cosine_unit_interval_numpy(a, b), abs=1e-5
+            )
+
+    @pytest.mark.parametrize("use_kernel", [True, False])
+    def test_calculate_similarity(self, vectorizer, monkeypatch, use_kernel):
+        if use_kernel and not NUMBA_AVAILABLE:
+            pytest.skip("numba not installed")
+        if not use_kernel:
+            monkeypatch.setattr(
+                vec_module,
+                "_cosine_unit_interval",
+                _cosine_unit_interval_numpy,
+            )
+
+        assert vectorizer.calculate_similarity(
+            [1.0, 0.0], [0.0, 1.0]
+        ) == pytest.approx(0.5)
+        assert vectorizer.calculate_similarity([1.0], [1.0, 0.0]) == 0.0